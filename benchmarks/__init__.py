@@ -0,0 +1,3 @@
+"""
+Benchmark suite for PyRemoteRestMap. Run from the repository root with: python -m benchmarks.run
+"""
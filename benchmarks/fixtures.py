@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Synthetic sitefind html pages for benchmarks.
+
+    random_sequence(10000)                  # reproducible random DNA
+    synthetic_map_html(1000000)             # map page for a 1 Mb sequence, all bundled enzymes
+    synthetic_digest_html(1000000)          # digest page whose fragments add up to 1 Mb
+    error_html(), no_cut_sites_html()
+
+The pages are generated directly (not by scanning a sequence), so even 10 Mb fixtures are quick
+to make. Cut numbers follow the expected frequency of each site in random sequence, so the page
+sizes scale like real all-enzyme maps. render_map_html/render_digest_html render any
+MapSites/Digest result in the same format, e.g. for the stub server.
+"""
+
+import html
+import random
+
+from pyremoterestmap.local import default_enzymes
+
+
+SCALES = {"1kb": 1000, "10kb": 10000, "100kb": 100000, "1Mb": 1000000, "10Mb": 10000000}
+
+MAP_HEADERS = ["NAME", "SITE", "LENGTH", "CUTNUMBER", "OVERHANG", "CUTLIST"]
+DIGEST_HEADERS = ["LENGTH", "START_ENZ", "FIVE_PRIME", "END_ENZ", "THREE_PRIME", "SEQUENCE"]
+
+
+def random_sequence(length, seed=0):
+    rng = random.Random(seed)
+    return "".join(rng.choices("ACGT", k=length))
+
+
+def _page(title, headers, rows, noncutters=None):
+    parts = ["<html><head><title>%s</title></head><body>\n" % html.escape(title),
+             "<table border=1>\n<tr>%s</tr>\n" % "".join("<td><b>%s</b></td>" % h for h in headers)]
+    parts.extend("<tr>%s</tr>\n" % "".join("<td>%s</td>" % html.escape(cell) for cell in row) for row in rows)
+    parts.append("</table>\n")
+    if noncutters is not None:
+        parts.append("<p><b>Noncutters: %s</b></p>\n" % ", ".join(noncutters))
+    parts.append("</body></html>\n")
+    return "".join(parts)
+
+
+def render_map_html(restriction_map):
+    """ Render a MapSites result as a sitefind map page. """
+    return _page("Restriction Map", MAP_HEADERS, restriction_map.rows, restriction_map.Noncutters or [])
+
+
+def render_digest_html(digest):
+    """ Render a Digest result as a sitefind digest page. """
+    return _page("Virtual Digest", DIGEST_HEADERS, list(digest.iter_rows()), digest.Noncutters or [])
+
+
+def _site_probability(site):
+    p = 1.0
+    for base in site:
+        p *= {"A": 1, "C": 1, "G": 1, "T": 1, "N": 4}.get(base, 2) / 4
+    return p
+
+
+def synthetic_map_rows(length, seed=0):
+    """ Return (rows, noncutters) for a synthetic all-enzyme map of a sequence of <length> bases. """
+    rng = random.Random(seed)
+    rows, noncutters = [], []
+    for enz in default_enzymes().values():
+        expected = length * _site_probability(enz.site) * (1 if enz.is_palindrome else 2)
+        cutnumber = int(rng.gauss(expected, expected ** 0.5)) if expected > 0.5 else int(rng.random() < expected)
+        if cutnumber <= 0:
+            noncutters.append(enz.name)
+            continue
+        cutnumber = min(cutnumber, length - 1)
+        positions = sorted(rng.sample(range(1, length), cutnumber))
+        rows.append([enz.name, enz.site, str(enz.length), str(cutnumber), enz.overhang,
+                     ", ".join(str(pos) for pos in positions)])
+    return rows, noncutters
+
+
+def synthetic_map_html(length, seed=0):
+    rows, noncutters = synthetic_map_rows(length, seed)
+    return _page("Restriction Map", MAP_HEADERS, rows, noncutters)
+
+
+def synthetic_digest_html(length, fragment_size=3000, seed=0):
+    """ Digest page with fragments of ~fragment_size bases (with full SEQUENCE column) adding up to length. """
+    rng = random.Random(seed)
+    sequence = random_sequence(length, seed)
+    enzymes = ["EcoRI", "BamHI", "HindIII", "PstI"]
+    rows, start, previous = [], 0, ""
+    while start < length:
+        end = min(length, start + max(1, int(rng.expovariate(1 / fragment_size))))
+        enzyme = rng.choice(enzymes) if end < length else ""
+        rows.append([str(end - start), previous, str(start + 1), enzyme, str(end), sequence[start:end]])
+        start, previous = end, enzyme
+    return _page("Virtual Digest", DIGEST_HEADERS, rows, ["XhoI", "NotI"])
+
+
+def error_html(message="Invalid sequence"):
+    return "<html><head><title>Error</title></head><body><p>%s</p></body></html>\n" % html.escape(message)
+
+
+def no_cut_sites_html():
+    return "<html><head><title>No Cut Sites</title></head><body><p>No Cut Sites</p></body></html>\n"
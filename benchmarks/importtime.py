@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Import-time benchmark.
+
+Each measurement imports the module in a fresh interpreter, and reports the import time
+and which of the heavy optional dependencies were loaded by the import:
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime pyremoterestmap pyremoterestmap.local --repeat 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ["requests", "bs4", "asyncio", "html.parser", "email.utils", "numpy"]
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import %s
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [name for name in %r if name in sys.modules]]))
+"""
+
+
+def measure_import(module="pyremoterestmap", repeat=10):
+    """ Return dict with best/median/mean import time (s) of module in a fresh interpreter, and the heavy modules loaded. """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    times, loaded = [], []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _SCRIPT % (module, HEAVY_MODULES)], env=env,
+                             capture_output=True, text=True, check=True).stdout
+        elapsed, loaded = json.loads(out)
+        times.append(elapsed)
+    return {"best": min(times), "median": statistics.median(times), "mean": statistics.mean(times),
+            "repeat": repeat, "number": 1, "loaded": loaded}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.importtime", description="Measure import times.")
+    ap.add_argument("modules", nargs="*", default=["pyremoterestmap"])
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args(argv)
+    for module in args.modules:
+        result = measure_import(module, args.repeat)
+        print("%-32s %8.1f ms (best %.1f ms)  loads: %s" % (
+            module, result["median"] * 1000, result["best"] * 1000, ", ".join(result["loaded"]) or "-"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Benchmark runner.
+
+Run from the repository root:
+
+    python -m benchmarks.run -o before.json
+    ... change things ...
+    python -m benchmarks.run -o after.json --compare before.json
+
+    python -m benchmarks.run --scales 1kb,10Mb --only parse    # select scales and benchmarks
+
+Benchmarks (each on synthetic pages from benchmarks.fixtures, at each scale):
+    parse_map, parse_digest     - MapSites/Digest from html (stream parser, and bs4 if installed).
+    parse_error, parse_nocuts   - detecting "Error" and "No Cut Sites" pages.
+    tab_file_map, tab_file_digest
+    cuts                        - MapSites.cuts()
+    normalize                   - RemoteRestMap.Sequence setter on a formatted sequence.
+    map_genome                  - genome.map_genome on a FASTA file (memory-mapped, chunked scan).
+    get_map, get_digest         - end-to-end requests (sequential and threaded) against the local
+                                  stub server (benchmarks.stubserver), with --latency per request.
+    import/pyremoterestmap      - "import pyremoterestmap" in a fresh interpreter (benchmarks.importtime).
+
+Results are written as JSON:
+    {"meta": {...}, "results": {"parse_map[stream]/1Mb": {"best": s, "median": s, "mean": s,
+                                                          "repeat": n, "number": n, ...}, ...}}
+Times are seconds per call (best/median/mean over <repeat> runs of <number> calls).
+A benchmark that fails is recorded with an "error" instead of times.
+With --compare, the median times are compared to an earlier results file, and the
+exit status is 1 if any benchmark is more than --threshold slower.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pyremoterestmap import RemoteRestMap
+from pyremoterestmap.digest import Digest
+from pyremoterestmap.map import MapSites
+from pyremoterestmap.parser import parse_html, check_page
+from pyremoterestmap.genome import map_genome
+
+from .fixtures import (SCALES, random_sequence, synthetic_map_html, synthetic_digest_html,
+                       error_html, no_cut_sites_html)
+from .stubserver import StubServer
+from .importtime import measure_import
+
+
+DEFAULT_SCALES = "1kb,10kb,100kb,1Mb"
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """
+    Time func() and return dict with best/median/mean seconds per call.
+    Each of the <repeat> runs calls func enough times to take at least min_time.
+    """
+    number, elapsed = 1, 0.0
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1000000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {"best": min(times), "median": statistics.median(times), "mean": statistics.mean(times),
+            "repeat": repeat, "number": number}
+
+
+def parsers():
+    try:
+        import bs4  # pylint: disable=W0611
+    except ImportError:
+        return ["stream"]
+    return ["stream", "bs4"]
+
+
+def _expect_error(html, message):
+    def check():
+        try:
+            check_page(parse_html(html), "bench")
+        except ValueError as e:
+            assert message in str(e)
+        else:
+            raise AssertionError("%s page not detected" % message)
+    return check
+
+
+def parse_benchmarks(scale, length):
+    """ Yield (name, func, extra info) for the parsing, tab_file and cuts benchmarks at one scale. """
+    map_html = synthetic_map_html(length)
+    digest_html = synthetic_digest_html(length)
+    info = {"map_bytes": len(map_html), "digest_bytes": len(digest_html)}
+    for parser in parsers():
+        yield "parse_map[%s]/%s" % (parser, scale), lambda p=parser: MapSites(map_html, parser=p), info
+        yield "parse_digest[%s]/%s" % (parser, scale), lambda p=parser: Digest(digest_html, parser=p), info
+    restriction_map = MapSites(map_html)
+    digest = Digest(digest_html)
+    yield "tab_file_map/%s" % scale, restriction_map.tab_file, info
+    yield "tab_file_digest/%s" % scale, digest.tab_file, info
+    yield "cuts/%s" % scale, restriction_map.cuts, info
+
+
+def normalize_benchmark(scale, length):
+    # GenBank-like formatting: lower case, numbers, spaces and newlines.
+    sequence = random_sequence(length).lower()
+    formatted = "\n".join("%9d %s" % (i + 1, " ".join(sequence[j:j + 10] for j in range(i, min(i + 60, length), 10)))
+                          for i in range(0, length, 60))
+    request = RemoteRestMap("http://localhost/", "")
+
+    def normalize():
+        request.Sequence = formatted
+    return "normalize/%s" % scale, normalize, {"input_bytes": len(formatted)}
+
+
+def genome_benchmark(scale, length, directory):
+    path = os.path.join(directory, "genome-%s.fasta" % scale)
+    sequence = random_sequence(length)
+    with open(path, "w") as fd:
+        fd.write(">genome\n")
+        for i in range(0, length, 80):
+            fd.write(sequence[i:i + 80] + "\n")
+    return "map_genome/%s" % scale, lambda: map_genome(path, {"minlength": 6}), {"file_bytes": os.path.getsize(path)}
+
+
+def request_benchmarks(latency, sequences=20, length=5000, threads=8):
+    """ Yield (name, func, info) for end-to-end get_map/get_digest against a local stub server. """
+    server = StubServer(latency=latency).start()
+    dnas = [random_sequence(length, seed) for seed in range(sequences)]
+    digest_settings = {"enzymelist": ["EcoRI", "BamHI", "HindIII"]}
+    info = {"latency": latency, "sequences": sequences, "length": length, "threads": threads}
+    try:
+        for method, settings in (("get_map", {}), ("get_digest", digest_settings)):
+            def sequential(method=method, settings=settings):
+                with RemoteRestMap(server.url, dnas[0]) as request:
+                    for dna in dnas:
+                        request.Sequence = dna
+                        getattr(request, method)(settings)
+
+            def threaded(method=method, settings=settings):
+                with RemoteRestMap(server.url, dnas[0]) as base:
+                    def fetch(dna):
+                        request = RemoteRestMap(server.url, dna, session=base.Session)
+                        return getattr(request, method)(settings)
+                    with ThreadPoolExecutor(max_workers=threads) as executor:
+                        list(executor.map(fetch, dnas))
+
+            yield "%s[sequential]" % method, sequential, info
+            yield "%s[threads=%s]" % (method, threads), threaded, info
+    finally:
+        server.stop()
+
+
+def metadata():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  check=False).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "machine": platform.machine(), "git": revision,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def run(scales, only=None, repeat=5, min_time=0.2, latency=0.01, requests=True, log=None):
+    """ Run the benchmarks and return the results dict (see module docstring). """
+    def benchmarks():
+        with tempfile.TemporaryDirectory() as directory:
+            for scale in scales:
+                length = SCALES[scale]
+                for bench in parse_benchmarks(scale, length):
+                    yield bench
+                yield normalize_benchmark(scale, length)
+                yield genome_benchmark(scale, length, directory)
+        yield "parse_error", _expect_error(error_html(), "Error"), {}
+        yield "parse_nocuts", _expect_error(no_cut_sites_html(), "No Cut Sites"), {}
+        if requests:
+            for bench in request_benchmarks(latency):
+                yield bench
+
+    results = {}
+    for name, func, info in benchmarks():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        try:
+            result = measure(func, repeat, min_time)
+        except Exception as e:     # pylint: disable=W0703
+            result = {"error": "%s: %s" % (type(e).__name__, e)}
+        result.update(info)
+        results[name] = result
+        if log:
+            log(name, result)
+    name = "import/pyremoterestmap"
+    if not only or any(pattern in name for pattern in only):
+        results[name] = measure_import("pyremoterestmap", max(repeat, 10))
+        if log:
+            log(name, results[name])
+    return {"meta": metadata(), "results": results}
+
+
+def compare(results, baseline, threshold=0.1):
+    """ Print median time ratios vs. baseline results. Returns list of names that regressed more than threshold. """
+    regressions = []
+    for name, result in results["results"].items():
+        old = baseline["results"].get(name)
+        if not old or "median" not in old or "median" not in result:
+            continue
+        ratio = result["median"] / old["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print("%-40s %10.6f -> %10.6f s  x%.2f%s" % (name, old["median"], result["median"], ratio, flag))
+    return regressions
+
+
+def print_result(name, result):
+    if "error" in result:
+        print("%-40s ERROR %s" % (name, result["error"]))
+    else:
+        print("%-40s %12.6f s (best %.6f, %s x %s)" % (name, result["median"], result["best"],
+                                                      result["repeat"], result["number"]))
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Run PyRemoteRestMap benchmarks.")
+    ap.add_argument("-o", "--output", help="Write JSON results to this file.")
+    ap.add_argument("--scales", default=DEFAULT_SCALES,
+                    help="Comma-separated scales (%s), or 'all'. Default: %s." % (", ".join(SCALES), DEFAULT_SCALES))
+    ap.add_argument("--only", action="append", help="Only run benchmarks whose name contains this (repeatable).")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--min-time", type=float, default=0.2, help="Min time (s) per timing run.")
+    ap.add_argument("--latency", type=float, default=0.01, help="Stub server latency (s) per request.")
+    ap.add_argument("--no-requests", action="store_true", help="Skip the end-to-end request benchmarks.")
+    ap.add_argument("--compare", help="Compare with earlier JSON results file.")
+    ap.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown reported as regression.")
+    args = ap.parse_args(argv)
+
+    scales = list(SCALES) if args.scales == "all" else args.scales.split(",")
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        ap.error("Unknown scale(s): %s" % ", ".join(unknown))
+    results = run(scales, args.only, args.repeat, args.min_time, args.latency, not args.no_requests,
+                  log=print_result)
+    if args.output:
+        with open(args.output, "w") as fd:
+            json.dump(results, fd, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as fd:
+            baseline = json.load(fd)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
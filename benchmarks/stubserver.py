@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Local HTTP stub of sitefind3.pl, for benchmarks (and manual testing).
+
+It accepts the same form posts as sitefind3.pl, computes the map or digest with
+pyremoterestmap.local.LocalRestMap and returns it as a sitefind html page, after a
+configurable latency. Settings that are not posted take the get_map defaults, as on sitefind.
+Sequences with invalid (or no) bases get an "Error" page and digests without cuts a
+"No Cut Sites" page. With error_rate, that fraction of the requests is answered
+with "503 Service Unavailable" (and a Retry-After header), to exercise control.HostController.
+With enzymes, the stub maps with that enzyme table instead of the bundled one (e.g. to act as a
+server that knows enzymes the client does not).
+
+    with StubServer(latency=0.05) as server:
+        request = RemoteRestMap(server.url, dna)
+        ...
+
+    python -m benchmarks.stubserver --port 8000 --latency 0.1
+"""
+
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from pyremoterestmap import default_settings
+from pyremoterestmap.local import LocalRestMap
+from pyremoterestmap.seqio import normalize_sequence
+
+from .fixtures import render_map_html, render_digest_html, error_html, no_cut_sites_html
+
+
+class SitefindHandler(BaseHTTPRequestHandler):
+    """ Handles POSTs like sitefind3.pl. """
+    protocol_version = "HTTP/1.1"   # keep-alive
+    # Headers and body are written separately; without TCP_NODELAY, Nagle's algorithm and the
+    # client's delayed ACK hold back the body for ~40 ms on every keep-alive response.
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("ascii", "replace"))
+        settings = {key: (values if key in ("overhang", "enzymelist") else values[0]) for key, values in form.items()}
+        sequence = settings.pop("sequence", "")
+        time.sleep(self.server.latency)
+        self.server.requests += 1
+        if random.random() < self.server.error_rate:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        sequence, invalid = normalize_sequence(sequence)
+        try:
+            request = LocalRestMap(sequence, enzymes=self.server.enzymes)
+            if invalid or not sequence:
+                body = error_html("Invalid sequence")
+            elif str(settings.get("digest")) == "1":
+                body = render_digest_html(request.get_digest(settings))
+            else:
+                # Like sitefind, use the default for each setting that is not posted:
+                body = render_map_html(request.get_map(dict(default_settings("map"), **settings)))
+        except ValueError as e:
+            body = no_cut_sites_html() if "No Cut Sites" in str(e) else error_html(str(e))
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        pass
+
+
+class StubServer(object):
+    """ Runs the sitefind stub in a background thread. url is the sitefind3.pl url to use. """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, enzymes=None):
+        self.httpd = ThreadingHTTPServer((host, port), SitefindHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.requests = 0
+        self.httpd.error_rate = error_rate
+        self.httpd.enzymes = enzymes
+        self.url = "http://%s:%s/cgi-bin/sitefind3.pl" % self.httpd.server_address[:2]
+        self._thread = None
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local sitefind3.pl stub server.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--latency", type=float, default=0.0, help="Delay (seconds) before each response.")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    args = ap.parse_args(argv)
+    server = StubServer(args.host, args.port, args.latency, args.error_rate)
+    print("Serving sitefind stub at", server.url)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
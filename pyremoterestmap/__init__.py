@@ -178,9 +178,33 @@ The keys are:
 
 from .digest import Digest
 from .map import Map
+from .parser import parse_html, check_page
+from .seqio import normalize_sequence, read_records
+from .coalesce import SingleFlight, get_singleflight
+from .metrics import RequestStats, RequestMetrics
+from .control import HostController, CircuitOpenError, get_controller
+
+import importlib
+import time
+
+# requests (the http client) and the html parser backends are imported when they are first needed,
+# by make_session and parser.parse_html. These names are likewise imported on first access:
+_LAZY_ATTRIBUTES = {
+    "ResultCache": ".cache", "cache_key": ".cache",
+    "chunked_map": ".chunking",
+    "SupersetMap": ".superset", "superset_settings": ".superset",
+    "ResultStore": ".store",
+    "scan_genome": ".genome", "map_genome": ".genome",
+    "CutterTable": ".enzymeindex",
+}
+
 
-import requests
-from bs4 import BeautifulSoup
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
 
 
 def default_settings(function=None):
@@ -202,7 +226,7 @@ def default_settings(function=None):
     # Return empty dict to use site defaults:
     if not function:
         return {}
-    elif function is 'digest':
+    elif function == 'digest':
         return {
             "DNAtype": "linear",
             "enzymelist": [],   # This is required and must be non-empty when you invoke the request!
@@ -212,7 +236,7 @@ def default_settings(function=None):
     else:
         return {
             "DNAtype": "linear",
-            "first": "frequencey", "second": "overhang", "third": "name",   # Sort order
+            "first": "frequency", "second": "overhang", "third": "name",   # Sort order
             "enzymetype": "all",
             "maxcuts": "all",
             "minlength": 5,
@@ -222,12 +246,60 @@ def default_settings(function=None):
             "digest": 0,
         }
 
+def make_session(pool_connections=10, pool_maxsize=10, user_agent="PyRemoteRestMap/0.1"):
+    """
+    Return a requests.Session with a keep-alive connection pool mounted for http and https.
+    The session can be passed to any number of RemoteRestMap objects, so that repeated requests
+    against the same sitefind host reuse the same sockets.
+    Args:
+        pool_connections - number of hosts to keep connection pools for.
+        pool_maxsize - max number of connections kept alive per host (should be >= number of threads).
+    """
+    import requests
+    import requests.adapters
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = user_agent
+    return session
+
+
 class RemoteRestMap(object):
 
 
-    def __init__(self, url, sequence, settings=None):
+    def __init__(self, url, sequence, settings=None, session=None,
+                 pool_connections=10, pool_maxsize=10, timeout=(10, 120), cache=None, parser="stream",
+                 chunk_size=None, chunk_overlap=50, max_workers=4, singleflight=None, stats=None,
+                 controller=None, superset=False):
         """
         A good url to use is: http://www.restrictionmapper.org/cgi-local/sitefind3.pl
+
+        Args:
+            session - a requests.Session to use for all requests. The session can be shared
+                between many RemoteRestMap instances (e.g. one per sequence); it is not closed
+                by this object. If not given, a keep-alive session is created on first use
+                and closed by close() or when leaving a with-block.
+            pool_connections, pool_maxsize - connection pool parameters for the owned session.
+            timeout - (connect, read) timeout in seconds, passed to requests.
+            cache - a cache.ResultCache (or anything with get(key) and put(key, result) methods).
+                If given, parsed results are cached by url, sequence and settings.
+            parser - html parser backend, "stream" or "bs4", see parser.parse_html.
+            chunk_size - if given, get_map maps sequences longer than this in overlapping windows
+                of chunk_size bases, fetched in parallel (max_workers threads) and merged.
+            chunk_overlap - overlap between windows; must be at least the longest recognition site
+                plus its longest cut distance, see chunking.py.
+            singleflight - a coalesce.SingleFlight (or True for the shared default instance).
+                Concurrent identical requests (same sequence and settings) through the same
+                SingleFlight are only fetched and parsed once, and all callers get the shared result.
+            stats - a metrics.RequestStats to record per-request metrics (timings, sizes, row counts) in,
+                e.g. shared between instances. Default is a new RequestStats, available as Stats.
+            controller - a control.HostController, which limits concurrency, retries transient failures
+                and stops requests to an unhealthy host, or True for the controller shared by all
+                instances with the same url (control.get_controller). Default is none.
+            superset - if True, get_map fetches one broad map of the sequence (all enzymes, cuts and overhangs,
+                once per DNAtype) and answers the settings from it locally, see superset.py. Settings that
+                filter on enzymes the local enzyme table does not know are still sent to the server.
         """
 
         self.ValidBases = "ATGC"
@@ -236,6 +308,40 @@ class RemoteRestMap(object):
         self.Url = url
         self.Sequence = sequence
         self.Settings = settings
+        self.PoolConnections = pool_connections
+        self.PoolMaxsize = pool_maxsize
+        self.Timeout = timeout
+        self._session = session
+        self._owns_session = session is None
+        self.Cache = cache
+        self.Parser = parser
+        self.ChunkSize = chunk_size
+        self.ChunkOverlap = chunk_overlap
+        self.MaxWorkers = max_workers
+        self.SingleFlight = get_singleflight(singleflight)
+        self.Stats = stats if stats is not None else RequestStats()
+        self.Controller = get_controller(url) if controller is True else (controller or None)
+        self.Superset = superset
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def Session(self):
+        """ The requests.Session used for requests. Created on first use if not injected. """
+        if self._session is None:
+            self._session = make_session(self.PoolConnections, self.PoolMaxsize)
+            self._owns_session = True
+        return self._session
+
+    def close(self):
+        """ Close the session, if it is owned by this object. Injected sessions are left open. """
+        if self._session is not None and self._owns_session:
+            self._session.close()
+            self._session = None
 
 
     @property
@@ -243,27 +349,34 @@ class RemoteRestMap(object):
         return self._sequence
     @Sequence.setter
     def Sequence(self, sequence):
-        if any(l not in self.ValidBases for l in sequence.upper()):
-            if not self.AllowNonValidBases:
-                print("Invalid sequence")
-                return
-        self._sequence = "".join(l for l in sequence.upper()
-                                 if l in self.AllowNonValidBases
-                                 or not self.StripNonValidBases)
+        """
+        Set sequence. The sequence is upper-cased. With StripNonValidBases, whitespace and numbers are
+        removed, and other characters not in ValidBases are invalid; else all characters not in ValidBases
+        (whitespace and numbers too) are invalid, and kept. Invalid characters raise ValueError if
+        AllowNonValidBases is False.
+        The positions of invalid characters are available as InvalidPositions.
+        """
+        normalized, invalid = normalize_sequence(sequence, self.ValidBases, self.StripNonValidBases)
+        if invalid and not self.AllowNonValidBases:
+            raise ValueError("Invalid sequence, %s invalid characters at positions %s%s" % (
+                len(invalid), ", ".join(str(pos) for pos in invalid[:10]), "..." if len(invalid) > 10 else ""))
+        self.InvalidPositions = invalid
+        self._sequence = normalized
+        self._supersets = {}
 
     @property
     def Settings(self):
         if not self._settings:
-            return self.default_settings()
+            return default_settings()
         return self._settings
-    @Sequence.setter
+    @Settings.setter
     def Settings(self, settings):
         if not self._validate_settings(settings):
             print("Invalid settings")
         self._settings = settings
 
     def get_settings(self, function=None, **kwargs):
-        settings = self.default_settings(function)
+        settings = default_settings(function)
         settings.update(self.Settings)
         settings.update(kwargs)
         self._validate_settings(settings)   # Should raise an exception if issue.
@@ -292,10 +405,8 @@ class RemoteRestMap(object):
         settings = settings.copy()
         settings['digest'] = 1      # Tells sitefind to digest instead of map
 
-        response = self._fetch(self.Url, settings)
-        # Probably verify response here...
-        digest = Digest(response.text)
-        return digest
+        return self._measured("digest", settings,
+                              lambda metrics: self._build(Digest, self._fetch(self.Url, settings, metrics), metrics))
 
 
     def get_map(self, settings):
@@ -341,16 +452,99 @@ class RemoteRestMap(object):
         """
         if settings is None:
             settings = self.Settings
-        response = self._fetch(self.Url, settings)
-        map_obj = Map(response.text)
-        return map_obj
-
-
-    def _fetch(self, url, settings):
+        if self.Superset:
+            superset = self.superset_map(settings.get("DNAtype") or "linear")
+            # Settings that need metadata of enzymes outside the local enzyme table go to the server:
+            if superset.answers(settings):
+                return superset.select(settings)
+        return self._get_map(settings)
+
+    def superset_map(self, dnatype="linear"):
+        """ Return the (cached) superset.SupersetMap of the sequence, fetching the superset map on first use. """
+        if dnatype not in self._supersets:
+            from .superset import SupersetMap, superset_settings
+            self._supersets[dnatype] = SupersetMap(self._get_map(superset_settings(dnatype)))
+        return self._supersets[dnatype]
+
+    def _get_map(self, settings):
+        """ Fetch (or chunk and merge) the map for settings, via the cache. """
+        if self.ChunkSize and len(self.Sequence) > self.ChunkSize:
+            # The window requests are recorded separately (with the same Stats):
+            from .chunking import chunked_map
+            return self._measured("map", settings, lambda metrics: chunked_map(
+                self.Sequence, self._map_window, self.ChunkSize, self.ChunkOverlap, settings, self.MaxWorkers))
+        return self._measured("map", settings,
+                              lambda metrics: self._build(Map, self._fetch(self.Url, settings, metrics), metrics))
+
+    def _map_window(self, sequence, settings):
+        """ Map a window of the sequence, sharing session and settings with this request. """
+        request = RemoteRestMap(self.Url, sequence, session=self.Session, timeout=self.Timeout,
+                                cache=self.Cache, parser=self.Parser, singleflight=self.SingleFlight,
+                                stats=self.Stats, controller=self.Controller)
+        return request.get_map(settings)
+
+    def _measured(self, method, settings, factory):
+        """
+        Return result of factory(metrics), via the cache (see _cached), and record a metrics.RequestMetrics
+        for the call in self.Stats. factory fills in the fetch and parse fields of the metrics dict.
+        """
+        metrics = dict.fromkeys(RequestMetrics._fields)
+        metrics.update(method=method, url=self.Url, sequence_length=len(self.Sequence), fetched=False)
+        start = time.perf_counter()
+        try:
+            result = self._cached(settings, lambda: factory(metrics))
+            metrics['rows'] = len(result.rows or [])
+            metrics['noncutters'] = len(result.Noncutters or [])
+            return result
+        except Exception as e:
+            metrics['error'] = "%s: %s" % (type(e).__name__, e)
+            raise
+        finally:
+            metrics['total_time'] = time.perf_counter() - start
+            self.Stats.record(RequestMetrics(**metrics))
+
+    @staticmethod
+    def _build(cls, page, metrics):
+        """ Return cls(page), i.e. the Digest/MapSites result, recording the build time in metrics. """
+        start = time.perf_counter()
+        result = cls(page)
+        metrics['build_time'] = time.perf_counter() - start
+        return result
+
+    def _cached(self, settings, factory):
+        """
+        Return result from cache, if available, else invoke factory() to fetch and parse the result.
+        With a SingleFlight, concurrent calls for the same key share a single factory() call.
+        """
+        if self.Cache is None and self.SingleFlight is None:
+            return factory()
+        from .cache import cache_key
+        key = cache_key(self.Url, self.Sequence, settings)
+        if self.Cache is not None:
+            result = self.Cache.get(key)
+            if result is not None:
+                return result
+
+        def fetch():
+            result = factory()
+            if self.Cache is not None:
+                self.Cache.put(key, result)
+            return result
+
+        if self.SingleFlight is not None:
+            return self.SingleFlight.do(key, fetch)
+        return fetch()
+
+
+    def _fetch(self, url, settings, metrics=None):
         """
         form action = "cgi-bin/sitefind3.pl
         method = "post"
         onsubmit="return validate_sequence(document.rm_form.sequence.value);
+
+        Returns the parsed response as a parser.SitefindPage, ready to be passed to Digest/MapSites.
+        The response is only parsed once; error pages are detected in the same pass.
+        If a metrics dict is given, the request and parse metrics are stored in it (see metrics.RequestMetrics).
         """
         if url is None:
             url = self.Url
@@ -358,18 +552,35 @@ class RemoteRestMap(object):
             settings = self.Settings
 
         form = settings.copy()
-        user_agent = "PyRemoteRestMap/0.1"
         form['sequence'] = self.Sequence
 
         # data : is sent in the post request body; params are sent in the query.
         # To debug, use: requests.Request('post', url=url, data=form).prepare().body
-        res = requests.post(url, data=form)
-        res.raise_for_errors()
-        soup = BeautifulSoup(res.text)
-        title = soup.find('title').text
-        if title == "Error":
-            raise ValueError("Error response from %s: %s" % (url, title))
-
-        # time.sleep(3)     # I assume this is in order not to overload the server. Should be done better.
-
-        return res
+        # Using the session (rather than requests.post) keeps the connection alive between requests.
+        # With stream=True, post returns when the headers are received, so the body transfer can be timed separately.
+        if metrics is None:
+            metrics = {}
+        attempts = []
+
+        def send():
+            attempts.append(time.perf_counter())
+            res = self.Session.post(url, data=form, timeout=self.Timeout, stream=True)
+            received = time.perf_counter()
+            content = res.content
+            metrics.update(fetched=True, status=res.status_code, payload_bytes=len(res.request.body or ""),
+                           ttfb=received - attempts[-1], transfer_time=time.perf_counter() - received,
+                           response_bytes=len(content))
+            res.raise_for_status()
+            return res
+
+        # The controller paces requests to the host and retries transient failures:
+        try:
+            res = self.Controller.call(send) if self.Controller is not None else send()
+        finally:
+            metrics['retries'] = max(len(attempts) - 1, 0)
+        start = time.perf_counter()
+        page = parse_html(res.text, self.Parser)
+        metrics['parse_time'] = time.perf_counter() - start
+        check_page(page, url)
+
+        return page
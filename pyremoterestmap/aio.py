@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+asyncio interface for mapping and digesting many sequences concurrently.
+
+    from pyremoterestmap.aio import AsyncRemoteRestMap
+
+    async def main():
+        async with AsyncRemoteRestMap(url, max_concurrency=4, rate=2) as client:
+            async for res in client.map_many({"pUC19": seq1, "pET28": seq2}, settings):
+                if res.error:
+                    print(res.key, "failed:", res.error)
+                else:
+                    print(res.key, res.result.total)
+
+Results are yielded as they complete (not in input order), each as a BatchResult
+with the key of the input sequence (its index, or its name if (name, sequence) pairs or a dict was given),
+the MapSites/Digest result, and the exception if the request failed.
+A failing item never aborts the batch.
+
+The requests themselves are made with the normal (blocking) RemoteRestMap, in a thread pool,
+so all RemoteRestMap features (shared session, etc.) also apply here.
+"""
+
+import asyncio
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from . import RemoteRestMap, make_session
+from .cache import cache_key
+from .coalesce import get_singleflight
+
+
+BatchResult = namedtuple("BatchResult", ["key", "result", "error"])
+
+
+class HostRateLimiter(object):
+    """
+    Simple rate limiter, allowing at most <rate> requests per second to start.
+    """
+
+    def __init__(self, rate):
+        self.Interval = 1.0 / rate if rate else 0
+        self._next = 0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.Interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.Interval
+
+
+class AsyncRemoteRestMap(object):
+    """
+    Async batch counterpart to RemoteRestMap.
+    Args:
+        url - url of sitefind3.pl
+        settings - default settings, used if map_many/digest_many is not given any.
+        max_concurrency - max number of requests in flight at any time.
+        rate - max number of requests per second to start against a single host. None/0 = unlimited.
+        session - requests.Session shared by all requests (one with a suitable pool is created if not given).
+        singleflight - a coalesce.SingleFlight (or True for the shared default instance); identical
+            requests in flight at the same time (same sequence, settings and method) are only made once.
+    """
+
+    def __init__(self, url, settings=None, max_concurrency=4, rate=1.0, session=None, singleflight=None,
+                 **kwargs):
+        self.Url = url
+        self.Settings = settings
+        self.MaxConcurrency = max_concurrency
+        self.Rate = rate
+        self.RemoteKwargs = kwargs  # passed on to RemoteRestMap
+        self._owns_session = session is None
+        self.Session = session or make_session(pool_maxsize=max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._limiters = {}
+        self.SingleFlight = get_singleflight(singleflight)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._owns_session:
+            self.Session.close()
+
+    def _limiter(self, url):
+        host = urlparse(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = HostRateLimiter(self.Rate)
+        return self._limiters[host]
+
+    async def _request(self, semaphore, request, method, settings):
+        async with semaphore:
+            await self._limiter(self.Url).wait()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, getattr(request, method), settings)
+
+    async def _run(self, semaphore, key, sequence, method, settings):
+        try:
+            request = RemoteRestMap(self.Url, sequence, settings, session=self.Session, **self.RemoteKwargs)
+            if self.SingleFlight is None:
+                result = await self._request(semaphore, request, method, settings)
+            else:
+                flight_key = (method, cache_key(self.Url, request.Sequence, settings))
+                result = await self.SingleFlight.ado(
+                    flight_key, lambda: self._request(semaphore, request, method, settings))
+        except Exception as e:     # pylint: disable=W0703
+            return BatchResult(key, None, e)
+        return BatchResult(key, result, None)
+
+    async def _run_many(self, sequences, method, settings):
+        if settings is None:
+            settings = self.Settings
+        if isinstance(sequences, dict):
+            items = sequences.items()
+        else:
+            # A list of sequences, or of (name, sequence) pairs, e.g. from seqio.read_records:
+            items = (item if isinstance(item, tuple) else (i, item) for i, item in enumerate(sequences))
+        semaphore = asyncio.Semaphore(self.MaxConcurrency)
+        # Items are taken from the iterable only as tasks finish, so at most max_concurrency are pending
+        # (and e.g. a read_records stream is not read into memory up front):
+        pending = set()
+        try:
+            for key, seq in items:
+                pending.add(asyncio.ensure_future(self._run(semaphore, key, seq, method, settings)))
+                if len(pending) >= self.MaxConcurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def map_many(self, sequences, settings=None):
+        """
+        Map all sequences (a list of sequences, a list of (name, sequence) pairs, or a dict of name: sequence).
+        Returns an async generator yielding BatchResult with MapSites results as they complete.
+        """
+        return self._run_many(sequences, "get_map", settings)
+
+    def digest_many(self, sequences, settings=None):
+        """
+        Digest all sequences (as for map_many). Settings must have enzymelist.
+        Returns an async generator yielding BatchResult with Digest results as they complete.
+        """
+        return self._run_many(sequences, "get_digest", settings)
+
+    async def map(self, sequence, settings=None):
+        """ Map a single sequence, returns MapSites (raises on error). """
+        async for res in self.map_many([sequence], settings):
+            if res.error:
+                raise res.error
+            return res.result
+
+    async def digest(self, sequence, settings=None):
+        """ Digest a single sequence, returns Digest (raises on error). """
+        async for res in self.digest_many([sequence], settings):
+            if res.error:
+                raise res.error
+            return res.result
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Bulk conversion of saved sitefind html pages.
+
+Parses many saved map/digest pages in a process pool, and writes all results to one
+consolidated TSV, JSONL or Parquet file (Parquet requires pyarrow).
+
+API:
+    for res in convert(["archive/", "more/*.html"], processes=8):
+        if res.error:
+            print(res.path, res.error)
+        else:
+            restriction_map = res.to_result()   # MapSites or Digest
+
+    write_output(convert(paths), "all.tsv")    # or .jsonl / .parquet
+
+Command line:
+    python -m pyremoterestmap.bulk archive/ "more/*.html" -o all.jsonl -j 8
+
+Results are streamed in input order. A page that fails to parse does not stop the
+conversion; its error is recorded (as an "error" record in JSONL/Parquet, and on stderr).
+Each page is detected as a map or a digest from its title, or else its table columns (see detect_kind).
+
+TSV output has one line per table row: path, kind, then the row's columns
+(with a header line whenever the columns change, e.g. between maps and digests).
+JSONL output has one record per page: path, kind, headers, rows, noncutters, error.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .parser import parse_html, check_page
+
+
+HTML_EXTENSIONS = (".html", ".htm")
+
+
+class BulkResult(namedtuple("BulkResult", ["path", "kind", "headers", "rows", "noncutters", "error"])):
+    """ Result of parsing one saved page. kind is "map", "digest" or None (on error). """
+    __slots__ = ()
+
+    def to_result(self):
+        """ Return the page as MapSites or Digest object. """
+        from .parser import SitefindPage
+        from .digest import Digest
+        from .map import MapSites
+        if self.error:
+            raise ValueError("%s: %s" % (self.path, self.error))
+        cls = MapSites if self.kind == "map" else Digest
+        return cls(SitefindPage(None, self.rows, self.noncutters), headers=self.headers)
+
+
+# Columns only found in map tables and only in digest tables (headers upper-cased, without spaces and underscores):
+MAP_COLUMNS = frozenset(["CUTNUMBER", "CUTLIST", "CUTPOSITIONS", "CUTS"])
+DIGEST_COLUMNS = frozenset(["STARTENZ", "ENDENZ", "FIVEPRIME", "THREEPRIME"])
+
+
+def detect_kind(page, headers):
+    """
+    Return "digest" or "map" for a parsed page: from the title ("... Digest" or "... Map"), else
+    from the table columns (CUTNUMBER/CUTLIST vs START_ENZ/END_ENZ/FIVE_PRIME/THREE_PRIME).
+    Columns that both tables can have (NAME, SITE, LENGTH, SEQUENCE, ...) are not used.
+    """
+    title = (page.title or "").lower()
+    if "digest" in title:
+        return "digest"
+    if "map" in title:
+        return "map"
+    columns = {"".join(header.upper().replace("_", " ").split()) for header in headers}
+    if columns & DIGEST_COLUMNS and not columns & MAP_COLUMNS:
+        return "digest"
+    return "map"
+
+
+def parse_file(path, parser="stream"):
+    """ Parse one saved page and return a BulkResult. Exceptions are captured in BulkResult.error. """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as fd:
+            page = parse_html(fd.read(), parser)
+        check_page(page, path)
+        rows = list(page.rows)
+        headers = rows.pop(0) if rows else []
+        return BulkResult(path, detect_kind(page, headers), headers, rows, page.noncutters, None)
+    except Exception as e:     # pylint: disable=W0703
+        return BulkResult(path, None, None, None, None, "%s: %s" % (type(e).__name__, e))
+
+
+def iter_files(patterns):
+    """ Expand directories (all .html/.htm files, recursively) and glob patterns to a sorted file list. """
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for dirpath, _, filenames in sorted(os.walk(pattern)):
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(HTML_EXTENSIONS):
+                        yield os.path.join(dirpath, filename)
+        else:
+            for path in sorted(glob.glob(pattern, recursive=True)) or []:
+                yield path
+
+
+def convert(patterns, processes=None, parser="stream", chunksize=16, progress=None):
+    """
+    Parse all pages matching patterns (files, directories or globs) in a pool of <processes>
+    worker processes, and yield BulkResult in input order.
+    progress, if given, is called as progress(done, total, result) after each page.
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    files = list(iter_files(patterns))
+    total = len(files)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for done, result in enumerate(executor.map(parse_file, files, [parser] * total, chunksize=chunksize), 1):
+            if progress:
+                progress(done, total, result)
+            yield result
+
+
+def write_tsv(results, fd):
+    """
+    Write one line per table row: path, kind, columns...
+    A header line (PATH, KIND, headers...) is written before the first row and whenever the headers change
+    (e.g. between maps and digests).
+    """
+    headers = None
+    for res in results:
+        if res.error:
+            yield res
+            continue
+        if res.headers != headers:
+            headers = res.headers
+            fd.write("\t".join(["PATH", "KIND"] + list(headers)) + "\n")
+        for row in res.rows:
+            fd.write("\t".join([res.path, res.kind] + row) + "\n")
+        yield res
+
+
+def write_jsonl(results, fd):
+    """ Write one JSON record per page. """
+    for res in results:
+        fd.write(json.dumps(res._asdict()) + "\n")
+        yield res
+
+
+def write_parquet(results, path, batch_size=1000):
+    """ Write one Parquet row per table row (columns: path, kind, headers, row, error), in record batches. """
+    import pyarrow
+    import pyarrow.parquet
+    schema = pyarrow.schema([("path", pyarrow.string()), ("kind", pyarrow.string()),
+                             ("headers", pyarrow.list_(pyarrow.string())), ("row", pyarrow.list_(pyarrow.string())),
+                             ("error", pyarrow.string())])
+    batch = []
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for res in results:
+            if res.error:
+                batch.append({"path": res.path, "kind": None, "headers": None, "row": None, "error": res.error})
+            for row in res.rows or []:
+                batch.append({"path": res.path, "kind": res.kind, "headers": res.headers, "row": row, "error": None})
+            if len(batch) >= batch_size:
+                writer.write_table(pyarrow.Table.from_pylist(batch, schema))
+                batch = []
+            yield res
+        if batch:
+            writer.write_table(pyarrow.Table.from_pylist(batch, schema))
+
+
+def write_output(results, path, fmt=None):
+    """
+    Write results to path, in format fmt ("tsv", "jsonl" or "parquet", default from the extension).
+    Returns (number of pages, number of errors).
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt == "parquet":
+        written = write_parquet(results, path)
+        return _count(written)
+    with open(path, "w", encoding="utf-8") as fd:
+        writer = write_jsonl if fmt in ("jsonl", "json") else write_tsv
+        return _count(writer(results, fd))
+
+
+def _count(results):
+    pages = errors = 0
+    for res in results:
+        pages += 1
+        errors += bool(res.error)
+    return pages, errors
+
+
+def main(argv=None):
+    """ Command line entry point. """
+    ap = argparse.ArgumentParser(prog="python -m pyremoterestmap.bulk",
+                                 description="Convert saved sitefind html pages to TSV, JSONL or Parquet.")
+    ap.add_argument("patterns", nargs="+", help="Html files, directories or glob patterns.")
+    ap.add_argument("-o", "--output", required=True, help="Output file (.tsv, .jsonl or .parquet).")
+    ap.add_argument("-f", "--format", choices=["tsv", "jsonl", "parquet"], help="Default: from output extension.")
+    ap.add_argument("-j", "--processes", type=int, default=None, help="Number of worker processes.")
+    ap.add_argument("--parser", default="stream", choices=["stream", "bs4"])
+    ap.add_argument("-q", "--quiet", action="store_true", help="Don't report progress.")
+    args = ap.parse_args(argv)
+
+    start = time.time()
+
+    def progress(done, total, result):
+        if result.error:
+            print("ERROR %s: %s" % (result.path, result.error), file=sys.stderr)
+        if not args.quiet and (done % 100 == 0 or done == total):
+            print("%s/%s pages (%.0f pages/s)" % (done, total, done / max(time.time() - start, 1e-9)),
+                  file=sys.stderr)
+
+    results = convert(args.patterns, args.processes, args.parser, progress=progress)
+    pages, errors = write_output(results, args.output, args.format)
+    print("Converted %s pages (%s errors) to %s" % (pages, errors, args.output), file=sys.stderr)
+    return 1 if errors and errors == pages else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Persistent, content-addressed cache of parsed sitefind results.
+
+    cache = ResultCache("~/.cache/pyremoterestmap", max_entries=10000, ttl=30*24*3600)
+    request = RemoteRestMap(url, dna, cache=cache)
+    restriction_map = request.get_map(settings)    # Only hits the server the first time.
+    print(cache.Stats)
+
+The cache key is a sha256 of the server url, the (normalized) sequence and the canonicalized
+settings, so the same backbone mapped with the same settings on the same server is only fetched
+and parsed once (and a cache shared by requests to different servers keeps their results apart).
+The parsed MapSites/Digest objects are pickled, so a cache hit skips both the network
+round trip and the html parsing.
+
+Entries are evicted least-recently-used first when the cache holds more than max_entries
+entries or max_bytes bytes, and are considered stale after ttl seconds.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+def canonical_settings(settings):
+    """
+    Return a canonical, json-serializable version of a settings dict.
+    Keys are sorted, values are stringified the way they are form-encoded when posted,
+    and None values (which are not posted) are dropped.
+    """
+    canon = {}
+    for key, value in (settings or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            canon[key] = [str(v) for v in value]
+        else:
+            canon[key] = str(value)
+    return json.dumps(canon, sort_keys=True, separators=(",", ":"))
+
+
+def cache_key(url, sequence, settings):
+    """ Return content address (hex digest) for a request of <sequence> with <settings> to the server at <url>. """
+    h = hashlib.sha256()
+    h.update((url or "").encode("utf-8"))
+    h.update(b"\0")
+    h.update(sequence.upper().encode("ascii", "replace"))
+    h.update(b"\0")
+    h.update(canonical_settings(settings).encode("utf-8"))
+    return h.hexdigest()
+
+
+class CacheStats(object):
+    """ Hit/miss statistics for a ResultCache. """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def asdict(self):
+        return dict(hits=self.hits, misses=self.misses, expired=self.expired,
+                    stores=self.stores, evictions=self.evictions, hit_rate=self.hit_rate)
+
+    def __repr__(self):
+        return "CacheStats(%s)" % ", ".join("%s=%s" % kv for kv in sorted(self.asdict().items()))
+
+
+class ResultCache(object):
+    """
+    On-disk LRU cache of parsed results.
+    Args:
+        directory - where to store the cache files. Created if it does not exist.
+        max_entries - max number of entries to keep (None = unbounded).
+        max_bytes - max total size of the cache files (None = unbounded).
+        ttl - time to live, in seconds, for each entry (None = never expires).
+    """
+
+    suffix = ".pickle"
+
+    def __init__(self, directory, max_entries=10000, max_bytes=None, ttl=None):
+        self.Directory = os.path.abspath(os.path.expanduser(directory))
+        self.MaxEntries = max_entries
+        self.MaxBytes = max_bytes
+        self.TTL = ttl
+        self.Stats = CacheStats()
+        self._lock = threading.RLock()
+        # key -> file size, ordered from least to most recently used:
+        self._index = OrderedDict()
+        self._bytes = 0
+        os.makedirs(self.Directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """ Build the LRU index from the files on disk, using mtime as last access. """
+        entries = []
+        for subdir in os.scandir(self.Directory):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith(self.suffix):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-len(self.suffix)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+
+    def path(self, key):
+        return os.path.join(self.Directory, key[:2], key + self.suffix)
+
+    def get(self, key, default=None):
+        """ Return cached result for key, or default if not cached (or expired). """
+        with self._lock:
+            if key not in self._index:
+                self.Stats.misses += 1
+                return default
+            path = self.path(key)
+            try:
+                with open(path, 'rb') as fd:
+                    created, result = pickle.load(fd)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                self._remove(key)
+                self.Stats.misses += 1
+                return default
+            if self.TTL is not None and time.time() - created > self.TTL:
+                self._remove(key)
+                self.Stats.expired += 1
+                self.Stats.misses += 1
+                return default
+            # Mark as recently used, both in memory and on disk (for the next session):
+            self._index.move_to_end(key)
+            os.utime(path)
+            self.Stats.hits += 1
+            return result
+
+    def put(self, key, result):
+        """ Store result under key, evicting least recently used entries if needed. """
+        path = self.path(key)
+        data = pickle.dumps((time.time(), result), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmppath = "%s.%s.tmp" % (path, os.getpid())
+            with open(tmppath, 'wb') as fd:
+                fd.write(data)
+            os.replace(tmppath, path)   # atomic, readers never see a partial file.
+            self._bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self.Stats.stores += 1
+            self._evict()
+
+    def _remove(self, key):
+        self._bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self._index and (
+                (self.MaxEntries is not None and len(self._index) > self.MaxEntries) or
+                (self.MaxBytes is not None and self._bytes > self.MaxBytes)):
+            key = next(iter(self._index))
+            self._remove(key)
+            self.Stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
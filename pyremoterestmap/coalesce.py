@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Single-flight coalescing of identical in-flight requests.
+
+If many threads (or asyncio tasks) ask for the same map at the same time, only the first
+one fetches and parses it; the others wait for that call and all get the same result
+(or the same exception).
+
+    singleflight = SingleFlight()
+    request = RemoteRestMap(url, dna, singleflight=singleflight)    # share between threads/instances
+    ...
+    singleflight.Stats    # {'calls': 10, 'executions': 1, 'coalesced': 9}
+
+Pass singleflight=True to RemoteRestMap/AsyncRemoteRestMap to use the module-wide default instance.
+Keys are the same canonical keys as used by the cache (see cache.cache_key).
+Note that the result object is shared by all callers, so don't modify it in place.
+"""
+
+import threading
+
+
+# Set as the result of an async call whose leading task was cancelled:
+_CANCELLED = object()
+
+
+class _Call(object):
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with the same key, for threads (do) and asyncio (ado).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.Stats = {'calls': 0, 'executions': 0, 'coalesced': 0}
+
+    def do(self, key, func):
+        """
+        Return func(), unless a call with the same key is already in flight,
+        in which case wait for it and return its result (or raise its exception).
+        """
+        with self._lock:
+            self.Stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.Stats['executions'] += 1
+            else:
+                self.Stats['coalesced'] += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    async def ado(self, key, coro_func):
+        """
+        Async version of do: return await coro_func(), or wait for the call with the same key
+        already in flight in this event loop.
+        If the task making the call is cancelled, the cancellation is not passed on to the waiting
+        tasks; instead one of them takes over and makes the call (with its own coro_func).
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        key = (id(loop), key)
+        with self._lock:
+            self.Stats['calls'] += 1
+        while True:
+            with self._lock:
+                future = self._async_calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._async_calls[key] = loop.create_future()
+                    self.Stats['executions'] += 1
+                else:
+                    self.Stats['coalesced'] += 1
+            if not leader:
+                # shield: a cancelled waiter must not cancel the shared call.
+                result = await asyncio.shield(future)
+                if result is _CANCELLED:
+                    # The leader was cancelled; make the call (or wait for the waiter that does).
+                    with self._lock:
+                        self.Stats['coalesced'] -= 1
+                    continue
+                return result
+            try:
+                result = await coro_func()
+            except asyncio.CancelledError:
+                future.set_result(_CANCELLED)
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                # Mark the exception as retrieved, in case nobody else is waiting:
+                future.exception()
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with self._lock:
+                    del self._async_calls[key]
+
+    @property
+    def in_flight(self):
+        return len(self._calls) + len(self._async_calls)
+
+
+default_singleflight = SingleFlight()
+
+
+def get_singleflight(singleflight):
+    """ Return SingleFlight instance for a singleflight argument (None, True or a SingleFlight). """
+    if singleflight is True:
+        return default_singleflight
+    return singleflight or None
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Compact, column-oriented storage of MapSites and Digest results.
+
+MapSites/Digest keep each row as a list of strings plus a dict per row. For large results
+(e.g. an all-enzyme map of a large sequence) that is a lot of small python objects, and
+every numeric query has to re-parse the strings. ColumnarMap and ColumnarDigest instead keep:
+    * names, sites and enzyme names as lists of interned strings (shared between rows and results),
+    * overhangs as an array of small integer codes (see OVERHANGS),
+    * lengths, counts and positions as array('l') integer arrays,
+    * the cut positions of all enzymes in one flat array, with the cuts of enzyme i in
+      cutpos[cutoffsets[i]:cutoffsets[i+1]] (CSR layout).
+
+Row views (MapRow, FragmentRow) are small __slots__ records created on demand;
+they support both attribute access (row.NAME) and item access (row['NAME']).
+
+    cmap = restriction_map.to_columnar()    # or ColumnarMap.from_map(restriction_map)
+    cmap.lengths, cmap.cutnumbers, cmap.enzyme_cuts(0), cmap[0].CUTPOS
+    restriction_map = cmap.to_map()
+"""
+
+import sys
+from array import array
+from itertools import chain
+
+from .parser import SitefindPage
+from .digest import slice_fragment
+
+
+OVERHANGS = ("five_prime", "three_prime", "blunt", "")
+OVERHANG_CODES = {name: code for code, name in enumerate(OVERHANGS)}
+
+
+class _Record(object):
+    """ Base class for row records: item access by header name and dict conversion. """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def asdict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join("%s=%r" % kv for kv in self.asdict().items()))
+
+
+class MapRow(_Record):
+    """ One enzyme of a ColumnarMap. Numeric columns are ints, CUTPOS an array of ints. """
+    __slots__ = ("NAME", "SITE", "LENGTH", "CUTNUMBER", "OVERHANG", "CUTPOS")
+
+    def __init__(self, NAME, SITE, LENGTH, CUTNUMBER, OVERHANG, CUTPOS):
+        self.NAME, self.SITE, self.LENGTH, self.CUTNUMBER, self.OVERHANG, self.CUTPOS = \
+            NAME, SITE, LENGTH, CUTNUMBER, OVERHANG, CUTPOS
+
+
+class FragmentRow(_Record):
+    """ One fragment of a ColumnarDigest. Numeric columns are ints. """
+    __slots__ = ("LENGTH", "START_ENZ", "FIVE_PRIME", "END_ENZ", "THREE_PRIME", "SEQUENCE")
+
+    def __init__(self, LENGTH, START_ENZ, FIVE_PRIME, END_ENZ, THREE_PRIME, SEQUENCE):
+        self.LENGTH, self.START_ENZ, self.FIVE_PRIME, self.END_ENZ, self.THREE_PRIME, self.SEQUENCE = \
+            LENGTH, START_ENZ, FIVE_PRIME, END_ENZ, THREE_PRIME, SEQUENCE
+
+
+def _int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class ColumnarMap(object):
+    """
+    Columnar restriction map. Build with from_map(MapSites) or from_cuts(dict, enzymes).
+    """
+
+    headers = list(MapRow.__slots__)
+
+    def __init__(self, names=(), sites=(), lengths=(), overhangs=(), cutpos=(), cutoffsets=(0,), noncutters=None):
+        self.names = [sys.intern(name) for name in names]
+        self.sites = [sys.intern(site) for site in sites]
+        self.lengths = array('l', lengths)
+        self.overhangs = array('b', overhangs)
+        self.cutpos = array('l', cutpos)
+        self.cutoffsets = array('l', cutoffsets)
+        self.Noncutters = [sys.intern(name) for name in noncutters] if noncutters is not None else None
+
+    @classmethod
+    def from_map(cls, restriction_map):
+        """ Convert a MapSites result. """
+        names, sites, lengths, overhangs, cutpos, cutoffsets = [], [], [], [], array('l'), array('l', [0])
+        for row in restriction_map.dictrows:
+            names.append(row['NAME'])
+            sites.append(row.get('SITE', ""))
+            lengths.append(_int(row.get('LENGTH')))
+            overhangs.append(OVERHANG_CODES.get(row.get('OVERHANG'), OVERHANG_CODES[""]))
+            cutpos.extend(int(pos) for pos in row['CUTPOS'] if pos)
+            cutoffsets.append(len(cutpos))
+        return cls(names, sites, lengths, overhangs, cutpos, cutoffsets, restriction_map.Noncutters)
+
+    @classmethod
+    def from_cuts(cls, cuts, enzymes, noncutters=None):
+        """
+        Build directly from a dict of enzyme name: sorted cut positions (e.g. local.SiteScanner.scan)
+        and a list of local.Enzyme (in row order), without going through string rows.
+        """
+        cutters = [enz for enz in enzymes if cuts.get(enz.name)]
+        cutoffsets = array('l', [0])
+        for enz in cutters:
+            cutoffsets.append(cutoffsets[-1] + len(cuts[enz.name]))
+        if noncutters is None:
+            noncutters = [enz.name for enz in enzymes if not cuts.get(enz.name)]
+        return cls([enz.name for enz in cutters], [enz.site for enz in cutters],
+                   [enz.length for enz in cutters], [OVERHANG_CODES[enz.overhang] for enz in cutters],
+                   chain.from_iterable(cuts[enz.name] for enz in cutters), cutoffsets, noncutters)
+
+    def to_map(self):
+        """ Convert back to a MapSites result. """
+        from .map import MapSites
+        rows = [[row.NAME, row.SITE, str(row.LENGTH), str(row.CUTNUMBER), row.OVERHANG,
+                 ", ".join(str(pos) for pos in row.CUTPOS)] for row in self]
+        return MapSites(SitefindPage("Restriction Map", rows, self.Noncutters), headers="standard")
+
+    @property
+    def cutnumbers(self):
+        """ Array with the number of cuts of each enzyme. """
+        offsets = self.cutoffsets
+        return array('l', (offsets[i+1] - offsets[i] for i in range(len(self.names))))
+
+    def enzyme_cuts(self, index):
+        """ Return array of the cut positions of enzyme number <index>. """
+        return self.cutpos[self.cutoffsets[index]:self.cutoffsets[index+1]]
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def total(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.names)
+        return MapRow(self.names[index], self.sites[index], self.lengths[index],
+                      self.cutoffsets[index+1] - self.cutoffsets[index],
+                      OVERHANGS[self.overhangs[index]], self.enzyme_cuts(index))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.names)))
+
+    def index(self, name):
+        """ Return the row index of enzyme <name>. """
+        return self.names.index(name)
+
+    def cuts(self):
+        """ Sorted list of unique cut positions (of all enzymes). """
+        return sorted(set(self.cutpos))
+
+    def cut_index(self, length=None, circular=False):
+        """
+        Return a positional index (index.CutIndex) over all cut positions, as MapSites.cut_index.
+        The index is built once and reused.
+        """
+        key = (length, circular)
+        if getattr(self, '_cut_index', None) is None or self._cut_index[0] != key:
+            from .index import CutIndex
+            self._cut_index = (key, CutIndex(self, length, circular))
+        return self._cut_index[1]
+
+    def tab_file(self, include_header=True):
+        """ Table in tab delimited format, same as MapSites.tab_file. """
+        return self.to_map().tab_file(include_header)
+
+
+class ColumnarDigest(object):
+    """
+    Columnar virtual digest. Build with from_digest(Digest).
+    If the digest is lazy (has a parent sequence), only the fragment offsets are kept,
+    otherwise the fragment sequences are kept in a list.
+    """
+
+    headers = list(FragmentRow.__slots__)
+
+    def __init__(self, lengths=(), start_enz=(), five_prime=(), end_enz=(), three_prime=(),
+                 sequences=None, parent=None, starts=(), ends=(), noncutters=None):
+        self.lengths = array('l', lengths)
+        self.start_enz = [sys.intern(name) for name in start_enz]
+        self.five_prime = array('l', five_prime)
+        self.end_enz = [sys.intern(name) for name in end_enz]
+        self.three_prime = array('l', three_prime)
+        self.sequences = sequences
+        self.Parent = parent
+        self.starts = array('l', starts)
+        self.ends = array('l', ends)
+        self.Noncutters = noncutters
+
+    @classmethod
+    def from_digest(cls, digest):
+        """ Convert a Digest result. """
+        rows = digest.dictrows
+        kwargs = {}
+        if digest.Parent is not None:
+            kwargs.update(parent=digest.Parent, starts=[start for start, _ in digest.Offsets],
+                          ends=[end for _, end in digest.Offsets])
+        else:
+            kwargs['sequences'] = [row.get('SEQUENCE', "") for row in rows]
+        return cls([_int(row.get('LENGTH')) for row in rows], [row.get('START_ENZ', "") for row in rows],
+                   [_int(row.get('FIVE_PRIME')) for row in rows], [row.get('END_ENZ', "") for row in rows],
+                   [_int(row.get('THREE_PRIME')) for row in rows], noncutters=digest.Noncutters, **kwargs)
+
+    def fragment_sequence(self, index):
+        """ Return the sequence of fragment <index>, as Digest.fragment_sequence. """
+        if self.Parent is None:
+            return self.sequences[index]
+        return slice_fragment(self.Parent, self.starts[index], self.ends[index])
+
+    def to_digest(self):
+        """ Convert back to a Digest result (lazy if this digest has a parent sequence). """
+        from .digest import Digest
+        rows = [[str(length), start_enz, str(five_prime), end_enz, str(three_prime)]
+                for length, start_enz, five_prime, end_enz, three_prime
+                in zip(self.lengths, self.start_enz, self.five_prime, self.end_enz, self.three_prime)]
+        if self.Parent is not None:
+            return Digest(SitefindPage("Virtual Digest", rows, self.Noncutters), headers="standard",
+                          parent=self.Parent, offsets=list(zip(self.starts, self.ends)))
+        for row, seq in zip(rows, self.sequences):
+            row.append(seq)
+        return Digest(SitefindPage("Virtual Digest", rows, self.Noncutters), headers="standard")
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @property
+    def total(self):
+        return len(self.lengths)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.lengths)
+        return FragmentRow(self.lengths[index], self.start_enz[index], self.five_prime[index],
+                           self.end_enz[index], self.three_prime[index], self.fragment_sequence(index))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.lengths)))
+
+    def tab_file(self, include_header=True):
+        return self.to_digest().tab_file(include_header)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Adaptive concurrency, retries and circuit breaking for requests to a sitefind server.
+
+RemoteRestMap instances (and AsyncRemoteRestMap, which uses them) given controller=True share one
+HostController per url (see get_controller), which:
+
+    * limits the number of concurrent requests to the host. The limit adapts AIMD-style:
+      it grows by 1/limit per successful request (i.e. about +1 per round of requests),
+      and is halved when a request fails with a transient error or is much slower than usual
+      (more than latency_tolerance times the running average latency, or latency_target if given).
+    * retries transient failures (connection errors, timeouts, http 429/500/502/503/504)
+      with jittered exponential backoff ("full jitter": a random delay between 0 and
+      backoff_base * 2**attempt, at most backoff_max), or as long as the server's Retry-After header asks.
+    * opens a circuit breaker after failure_threshold consecutive transient failures. While open,
+      requests fail immediately with CircuitOpenError. After reset_timeout seconds, one trial request
+      is let through ("half-open"); if it succeeds the circuit closes, otherwise it opens again.
+
+    request = RemoteRestMap(url, dna, controller=True)    # uses get_controller(url)
+    get_controller(url).Stats                         # {'requests': .., 'retries': .., 'failures': .., 'rejected': ..}
+    request = RemoteRestMap(url, dna, controller=HostController(max_retries=5, initial_limit=8))
+    request = RemoteRestMap(url, dna)                 # no controller (the default)
+
+The concurrency limit starts at initial_limit, so start it at (at least) the concurrency the caller
+uses (e.g. AsyncRemoteRestMap max_concurrency, or max_workers for chunked maps), else the controller
+throttles the caller until the limit has grown.
+
+Errors that are not transient (e.g. http 404, or sitefind "Error" pages) are raised immediately,
+and don't count against the host.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class CircuitOpenError(RuntimeError):
+    """ Raised when a request is rejected because the host's circuit breaker is open. """
+
+
+def response_status(exc):
+    """ Return the http status of the response attached to exc (e.g. a requests.HTTPError), or None. """
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def retry_after(exc):
+    """ Return the delay (seconds) requested by the Retry-After header of exc's response, or None. """
+    response = getattr(exc, 'response', None)
+    value = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    import email.utils
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+def is_transient(exc):
+    """
+    Return True if exc is worth retrying: a connection error or timeout (OSError, which includes
+    requests' RequestException) without a response, or a response with a status in RETRY_STATUSES.
+    Invalid requests (ValueError, e.g. requests.InvalidURL) are not.
+    """
+    if not isinstance(exc, OSError) or isinstance(exc, ValueError):
+        return False
+    status = response_status(exc)
+    return status is None or status in RETRY_STATUSES
+
+
+class HostController(object):
+    """
+    Concurrency limit, retry policy and circuit breaker for one host (see module docstring).
+    Args:
+        initial_limit, min_limit, max_limit - concurrency limit (number of requests in flight).
+        max_retries - number of retries of a transient failure (0 = no retries).
+        backoff_base, backoff_max - backoff delays in seconds; backoff_max also caps Retry-After.
+        latency_target - requests slower than this (seconds) reduce the limit. Default (None) is to
+            compare with the running average latency instead (times latency_tolerance).
+        failure_threshold - consecutive transient failures before the circuit opens.
+        reset_timeout - seconds before an open circuit lets a trial request through.
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=16, max_retries=3, backoff_base=0.5, backoff_max=60,
+                 latency_target=None, latency_tolerance=2.0, failure_threshold=5, reset_timeout=30):
+        self.MinLimit = min_limit
+        self.MaxLimit = max_limit
+        self.MaxRetries = max_retries
+        self.BackoffBase = backoff_base
+        self.BackoffMax = backoff_max
+        self.LatencyTarget = latency_target
+        self.LatencyTolerance = latency_tolerance
+        self.FailureThreshold = failure_threshold
+        self.ResetTimeout = reset_timeout
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.in_flight = 0
+        self.latency = None             # Running average latency (exponentially weighted).
+        self._samples = 0
+        self._last_decrease = 0.0
+        self.state = "closed"           # Circuit breaker: "closed", "open" or "half_open".
+        self.failures = 0               # Consecutive transient failures.
+        self._opened_at = 0.0
+        self._trial = False             # A half-open trial request is in flight.
+        self._cond = threading.Condition()
+        self.Stats = {'requests': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+
+    def _allow(self):
+        """ Check the circuit breaker before a request. Must hold the lock. """
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.ResetTimeout:
+                self.Stats['rejected'] += 1
+                raise CircuitOpenError("Circuit open after %s consecutive failures; retry in %.1f s" % (
+                    self.failures, self.ResetTimeout - (time.monotonic() - self._opened_at)))
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._trial:
+                self.Stats['rejected'] += 1
+                raise CircuitOpenError("Circuit half-open, waiting for trial request")
+            self._trial = True
+
+    @contextmanager
+    def slot(self):
+        """
+        Context manager: wait until a request may be sent (within the concurrency limit and circuit).
+        A half-open trial that leaves the slot without on_success/on_failure (e.g. interrupted by
+        KeyboardInterrupt or a cancellation) is released, so the next request can be the trial.
+        """
+        with self._cond:
+            self._allow()
+            trial = self.state == "half_open"
+            try:
+                while self.in_flight >= int(self.limit):
+                    self._cond.wait()
+            except BaseException:
+                if trial:
+                    self._trial = False
+                raise
+            self.in_flight += 1
+            self.Stats['requests'] += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                if trial:
+                    self._trial = False
+                self._cond.notify()
+
+    def on_success(self, latency):
+        with self._cond:
+            self.failures = 0
+            self.state = "closed"
+            self._trial = False
+            slow = self._is_slow(latency)
+            self._samples += 1
+            self.latency = latency if self.latency is None else 0.9 * self.latency + 0.1 * latency
+            if slow:
+                self._decrease()
+            else:
+                self.limit = min(self.MaxLimit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def on_failure(self, transient):
+        """ Record a failed request. Only transient failures reduce the limit and count towards opening the circuit. """
+        with self._cond:
+            if not transient:
+                # The server responded properly; release a half-open trial without judging the host.
+                if self.state == "half_open":
+                    self.state = "closed"
+                self._trial = False
+                return
+            self.Stats['failures'] += 1
+            self.failures += 1
+            self._decrease(force=True)
+            if self.state == "half_open" or self.failures >= self.FailureThreshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    def _is_slow(self, latency):
+        if self.LatencyTarget is not None:
+            return latency > self.LatencyTarget
+        return self._samples >= 5 and latency > self.LatencyTolerance * self.latency
+
+    def _decrease(self, force=False):
+        """ Halve the limit, at most once per average latency (so one burst of slow requests only counts once). """
+        now = time.monotonic()
+        if not force and now - self._last_decrease < (self.latency or 0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.MinLimit, self.limit / 2)
+
+    def backoff(self, attempt, exc=None):
+        """ Return the delay before retry number <attempt> (0-based): Retry-After if given, else full jitter. """
+        delay = retry_after(exc) if exc is not None else None
+        if delay is None:
+            delay = random.uniform(0, min(self.BackoffMax, self.BackoffBase * 2 ** attempt))
+        return min(delay, self.BackoffMax)
+
+    def call(self, func):
+        """
+        Return func(), sent within the concurrency limit and retried on transient failures.
+        func must raise for failed responses (e.g. with response.raise_for_status()).
+        """
+        attempt = 0
+        while True:
+            with self.slot():
+                start = time.monotonic()
+                try:
+                    result = func()
+                except Exception as e:
+                    transient = is_transient(e)
+                    self.on_failure(transient)
+                    if not transient or attempt >= self.MaxRetries or self.state == "open":
+                        raise
+                    delay = self.backoff(attempt, e)
+                else:
+                    self.on_success(time.monotonic() - start)
+                    return result
+            attempt += 1
+            with self._cond:
+                self.Stats['retries'] += 1
+            time.sleep(delay)
+
+    def __repr__(self):
+        return "HostController(limit=%.1f, in_flight=%s, state=%s)" % (self.limit, self.in_flight, self.state)
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(url, **kwargs):
+    """
+    Return the shared HostController for url, creating it (with kwargs, see HostController) on first use.
+    """
+    with _controllers_lock:
+        if url not in _controllers:
+            _controllers[url] = HostController(**kwargs)
+        return _controllers[url]
@@ -50,6 +50,17 @@ format for storage, export or whatever.
 
    file = digest.tab_file()
 
+write_tsv, write_csv, write_jsonl - Write the table to a file handle (or path), one row at a time,
+without building the whole table in memory. dump writes a compact binary file that
+export.load reads back into a Digest/MapSites without reparsing the html. See export.py.
+
+   digest.write_tsv(fd)
+
+enzyme_index - Returns a case-insensitive index of the enzymes in the result (with isoschizomer lookups),
+and cutter_set/noncutter_set the enzymes that cut/don't cut as frozensets. See enzymeindex.py.
+
+   digest.enzyme_index()["EcoRI"]
+
 total - Returns the number of fragments in the digest.
 
    frag_number = digest.total()
@@ -61,8 +72,46 @@ total - Returns the number of fragments in the digest.
 
 
 
-import requests
-from bs4 import BeautifulSoup
+import itertools
+
+from .parser import SitefindPage, parse_html, check_page, soup_to_page, parse_noncutters
+
+
+def slice_fragment(parent, start, end):
+    """
+    Return parent[start:end], the sequence of a fragment of a lazy digest. If the parent is a bytes
+    buffer, a zero-copy memoryview is returned (except for fragments spanning the origin).
+    """
+    if end > len(parent):
+        # Fragment spanning the origin of a circular sequence:
+        return parent[start:] + parent[:end - len(parent)]
+    if isinstance(parent, str):
+        return parent[start:end]
+    return memoryview(parent)[start:end]
+
+
+class LazyFragment(dict):
+    """
+    Fragment dict (as in Digest.dictrows) for a lazy Digest. SEQUENCE is not stored,
+    but sliced from the parent sequence when accessed as fragment['SEQUENCE'] or fragment.get('SEQUENCE').
+    """
+    __slots__ = ('_digest', '_index')
+
+    def __init__(self, digest, index, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._digest = digest
+        self._index = index
+
+    def __missing__(self, key):
+        if key == 'SEQUENCE':
+            return self._digest.fragment_sequence(self._index)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
 
 
 class Digest(object):
@@ -74,47 +123,89 @@ class Digest(object):
     """
 
 
-    def __init__(self, html, headers=None):
+    def __init__(self, html, headers=None, parser="stream", parent=None, offsets=None):
+        """
+        Args:
+            html - the sitefind html page (e.g. from a saved file), or an already parsed parser.SitefindPage.
+            headers - table headers. Default is to use the first row of the table.
+                Use "standard" to use the standard headers.
+            parser - "stream" to use the single-pass streamparser.SitefindParser, which does not build
+                a document tree and is considerably faster and leaner for large pages,
+                or "bs4" to parse the html with BeautifulSoup. The result is the same.
+            parent, offsets - the digested sequence and a list of (start, end) offsets of each fragment.
+                If given, the rows do not hold the fragment sequences (no SEQUENCE column);
+                instead each fragment sequence is sliced from the parent when it is accessed,
+                see fragment_sequence. Used by local.digest_sequence(..., lazy=True).
+        """
 
         if headers and headers == "standard":
             self.headers = self.standard_headers()
         else:
             self.headers = headers
-        self.root = root = BeautifulSoup(html)
-        title = root.find('title')
-        if "No Cut Sites" in title.text:
-            raise ValueError("No Cut Sites")
+        self.Parser = parser
+        self.Parent = parent
+        self.Offsets = offsets
 
         # Table has all the cutters:
         self.rows = None
         self.dictrows = None
         self.Noncutters = None
-        self.parse_htmldoc(root)
+        page = html if isinstance(html, SitefindPage) else parse_html(html, parser)
+        check_page(page)
+        self.parse_page(page)
 
     def standard_headers(self):
         return ["LENGTH", "START_ENZ", "FIVE_PRIME", "END_ENZ", "THREE_PRIME", "SEQUENCE"]
 
 
     def parse_htmldoc(self, root):
-        table = root.find('table')
-        rows = table.find_all('tr')
+        """ Set rows, dictrows and Noncutters from a BeautifulSoup document. """
+        self.parse_page(soup_to_page(root))
+
+    def parse_page(self, page):
+        """ Set rows, dictrows and Noncutters from a parser.SitefindPage. """
+        rows = list(page.rows)
         if self.headers is None:
-            headerrow = rows.pop(0)
-            self.headers = [td.text.strip() for td in headerrow.find_all('td')]
-        self.rows = [[td.text.strip() for td in row.find_all('td')] for row in rows]
+            self.headers = rows.pop(0)
+        self.rows = rows
         # Make dict-list data structure:
         self.dictrows = self.parse_rows()
-        # Noncutters:
-        self.Noncutters = self.get_noncutters(root)
+        self.Noncutters = page.noncutters
+        self._enzyme_index = None
 
     def parse_rows(self, rows=None, headers=None):
         if rows is None:
             rows = self.rows
         if headers is None:
             headers = self.headers
+        if self.Parent is not None:
+            return [LazyFragment(self, i, zip(headers, row)) for i, row in enumerate(rows)]
         dictrows = [dict(zip(headers, row)) for row in rows]
         return dictrows
 
+    def fragment_sequence(self, index):
+        """
+        Return the sequence of fragment <index>.
+        For lazy digests this is sliced from the parent sequence, see slice_fragment.
+        """
+        if self.Parent is None:
+            return self.dictrows[index]['SEQUENCE']
+        start, end = self.Offsets[index]
+        return slice_fragment(self.Parent, start, end)
+
+    def iter_rows(self):
+        """
+        Yield all rows (as lists, in header order). For lazy digests, the SEQUENCE
+        column is materialized one row at a time, so all sequences are never held at once.
+        """
+        if self.Parent is None:
+            for row in self.rows:
+                yield row
+            return
+        for i, row in enumerate(self.rows):
+            seq = self.fragment_sequence(i)
+            yield row + [seq if isinstance(seq, str) else bytes(seq).decode('ascii')]
+
 
     def get_noncutters(self, htmldoc):
         """
@@ -124,7 +215,7 @@ class Digest(object):
         bolds = htmldoc.find_all('b')
         noncutters = [elem for elem in bolds if "Noncutters:" in elem.text]
         if noncutters:
-            return [enz.strip() for enz in noncutters[0].text.split(',').replace('Noncutters:', '')]
+            return parse_noncutters(noncutters[0].text)
 
 
 
@@ -134,7 +225,32 @@ class Digest(object):
             for enzdigets
 
         """
-        return (enz for enz in self.dictrows)
+        if self.Parent is None:
+            return (enz for enz in self.dictrows)
+        return (dict(zip(self.headers, row)) for row in self.iter_rows())
+
+    def enzyme_index(self, aliases=None):
+        """
+        Return the case-insensitive enzyme index (enzymeindex.EnzymeIndex) of the result, for O(1) lookups
+        by enzyme name, with isoschizomers resolved via the enzyme table (aliases). Built once and reused.
+        """
+        from .enzymeindex import enzyme_index
+        return enzyme_index(self, aliases)
+
+    @property
+    def cutter_set(self):
+        """ frozenset of the names of the enzymes that cut. """
+        return self.enzyme_index().cutters
+
+    @property
+    def noncutter_set(self):
+        """ frozenset of the noncutters. """
+        return self.enzyme_index().noncutters
+
+    def to_columnar(self):
+        """ Return the result in compact, columnar form, see columnar.ColumnarDigest. """
+        from .columnar import ColumnarDigest
+        return ColumnarDigest.from_digest(self)
 
     @property
     def total(self):
@@ -144,5 +260,27 @@ class Digest(object):
         """ Make it easy to make a file from the object. """
         if not self.headers:
             return
-        return "\n".join("\t".join(row) for row in
-                         (self.headers if include_header and self.headers else []) + self.rows)
+        lines = ("\t".join(row) for row in self.iter_rows())
+        if include_header:
+            return "\n".join(itertools.chain(["\t".join(self.headers)], lines))
+        return "\n".join(lines)
+
+    def write_tsv(self, target, include_header=True):
+        """ Write the table as tab separated lines to a file handle or path, one row at a time. """
+        from .export import write_tsv
+        write_tsv(self, target, include_header)
+
+    def write_csv(self, target, include_header=True, **kwargs):
+        """ Write the table as CSV to a file handle or path, one row at a time. """
+        from .export import write_csv
+        write_csv(self, target, include_header, **kwargs)
+
+    def write_jsonl(self, target):
+        """ Write the table as one JSON object per row to a file handle or path. """
+        from .export import write_jsonl
+        write_jsonl(self, target)
+
+    def dump(self, target):
+        """ Write the result in the compact binary format; read it back with export.load. """
+        from .export import dump
+        dump(self, target)
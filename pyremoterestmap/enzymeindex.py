@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Name-keyed enzyme index and cutter/noncutter sets for MapSites and Digest results.
+
+    index = restriction_map.enzyme_index()
+    index["ecori"]              # the EcoRI row (dictrow), case insensitive
+    index["BstYI"]              # not in the map: the row of an isoschizomer that is (via the enzyme table)
+    "bamhi" in index            # True if BamHI (or an isoschizomer) cuts
+    index.cutters               # frozenset of the names of the enzymes that cut
+    index.noncutters            # frozenset of the noncutters
+
+For a Digest, index[name] is the list of fragments (dictrows) that the enzyme made (as START_ENZ or END_ENZ).
+
+Lookups are O(1): the rows are indexed by lower case name once, when the index is built (the index
+is cached on the result). Isoschizomers are looked up in the enzyme table (local.default_enzymes,
+or the aliases argument) only when a name is not in the result.
+
+CutterTable holds the cutter sets of many results as one inverted index (enzyme: bitmask of results),
+so set algebra across results is a few integer operations per enzyme:
+
+    table = CutterTable({"pA": map_a, "pB": map_b, "pC": map_c})
+    table.difference("pA", "pB")        # enzymes cutting pA but not pB
+    table.common()                      # enzymes cutting all results
+    table.cut_by("EcoRI")               # results that EcoRI cuts
+    table.select(cut=["EcoRI"], uncut=["BamHI", "XhoI"])    # results cut by EcoRI, but not BamHI or XhoI
+
+    cut_difference(map_a, map_b)        # the same for just two results, with frozenset algebra
+
+Enzyme names are compared case insensitively throughout; the returned names are spelled as in the results.
+Isoschizomers are resolved the same way everywhere: an enzyme counts as cutting a result if it or one of
+its isoschizomers does (so "BstYI" in index, table.cut_by("BstYI") and cut_difference agree, also between
+results mapped with and without isoschizomers). Pass aliases=False to match exact names only.
+"""
+
+
+_default_groups = None
+
+
+def isoschizomer_groups(enzymes=None):
+    """
+    Return dict of lower case enzyme name: tuple of the lower case names of all enzymes with the same
+    site (local.Enzyme.prototype), for an enzyme table (default: the bundled table).
+    """
+    global _default_groups
+    if enzymes is None:
+        if _default_groups is None:
+            from .local import default_enzymes
+            _default_groups = isoschizomer_groups(default_enzymes())
+        return _default_groups
+    if isinstance(enzymes, dict):
+        enzymes = enzymes.values()
+    by_prototype = {}
+    for enz in enzymes:
+        by_prototype.setdefault(enz.prototype.lower(), []).append(enz.name.lower())
+    return {name: tuple(names) for names in by_prototype.values() for name in names}
+
+
+def _split_names(value):
+    return [name.strip() for name in (value or "").split("/") if name.strip()]
+
+
+class EnzymeIndex(object):
+    """
+    Case-insensitive enzyme index of a MapSites or Digest result, see module docstring.
+    Args:
+        result - the MapSites or Digest.
+        aliases - enzyme table (dict of name: Enzyme) used to resolve isoschizomers,
+            None for the bundled table, or False to disable isoschizomer lookups.
+    """
+
+    def __init__(self, result, aliases=None):
+        self.Result = result
+        self.Aliases = aliases
+        self._groups = None
+        from .map import MapSites
+        self.is_map = isinstance(result, MapSites)
+        names = {}      # lower case name: name as spelled in the result
+        entries = {}    # lower case name: row index (map) or list of fragment indices (digest)
+        for i, row in enumerate(result.dictrows or ()):
+            if self.is_map:
+                key = row['NAME'].lower()
+                names.setdefault(key, row['NAME'])
+                entries.setdefault(key, i)
+            else:
+                for name in set(_split_names(row.get('START_ENZ')) + _split_names(row.get('END_ENZ'))):
+                    key = name.lower()
+                    names.setdefault(key, name)
+                    entries.setdefault(key, []).append(i)
+        self.names = names
+        self.entries = entries
+        self.cutter_keys = frozenset(entries)
+        self.cutters = frozenset(names.values())
+        self.noncutters = frozenset(result.Noncutters or ())
+        self.noncutter_keys = frozenset(name.lower() for name in self.noncutters)
+
+    def resolve(self, name):
+        """
+        Return the lower case key of enzyme <name> in the index, or of an isoschizomer of it
+        (the first one in the enzyme table), or None if neither cuts.
+        """
+        key = name.lower()
+        if key in self.entries:
+            return key
+        if self.Aliases is False:
+            return None
+        if self._groups is None:
+            self._groups = isoschizomer_groups(self.Aliases)
+        for alias in self._groups.get(key, ()):
+            if alias in self.entries:
+                return alias
+        return None
+
+    def __getitem__(self, name):
+        key = self.resolve(name)
+        if key is None:
+            raise KeyError(name)
+        dictrows = self.Result.dictrows
+        if self.is_map:
+            return dictrows[self.entries[key]]
+        return [dictrows[i] for i in self.entries[key]]
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name):
+        return self.resolve(name) is not None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.names.values())
+
+    def name(self, name):
+        """ Return the name of enzyme <name> (or of the isoschizomer that stands in for it) as spelled in the result. """
+        key = self.resolve(name)
+        return None if key is None else self.names[key]
+
+    def is_noncutter(self, name):
+        """ Return True if <name> is listed among the noncutters (case insensitive). """
+        return name.lower() in self.noncutter_keys
+
+
+def enzyme_index(result, aliases=None):
+    """ Return the (cached) EnzymeIndex of a result. """
+    cached = getattr(result, '_enzyme_index', None)
+    if cached is None or cached.Aliases is not aliases:
+        cached = EnzymeIndex(result, aliases)
+        result._enzyme_index = cached
+    return cached
+
+
+def cut_difference(a, b, aliases=None):
+    """
+    Return frozenset of the enzymes (named as in <a>) that cut result a but not result b,
+    i.e. neither they nor an isoschizomer cut b (aliases as for EnzymeIndex).
+    """
+    index_a, index_b = enzyme_index(a, aliases), enzyme_index(b, aliases)
+    return frozenset(index_a.names[key] for key in index_a.cutter_keys if key not in index_b)
+
+
+class CutterTable(object):
+    """
+    Inverted index of the cutters of many results, for set algebra across results, see module docstring.
+    Args:
+        results - dict of label: MapSites/Digest, or iterable of (label, result).
+        aliases - enzyme table used to resolve isoschizomers, as for EnzymeIndex.
+    """
+
+    def __init__(self, results, aliases=None):
+        if isinstance(results, dict):
+            results = results.items()
+        self.Aliases = aliases
+        self.labels = []
+        self.bits = {}          # label: bit
+        self.masks = {}         # lower case enzyme name: bitmask of the results it cuts
+        self.names = {}         # lower case enzyme name: name
+        self._groups = None
+        self._effective = None  # lower case enzyme name: bitmask of the results it or an isoschizomer cuts
+        for label, result in results:
+            self.add(label, result)
+
+    def _aliases(self, key):
+        """ Return the lower case names of enzyme <key> and its isoschizomers. """
+        if self.Aliases is False:
+            return (key,)
+        if self._groups is None:
+            self._groups = isoschizomer_groups(self.Aliases)
+        return self._groups.get(key, (key,))
+
+    def _enzyme_mask(self, enzyme):
+        """ Return bitmask of the results that <enzyme> (also one not in the table) or an isoschizomer cuts. """
+        mask = 0
+        for alias in self._aliases(enzyme.lower()):
+            mask |= self.masks.get(alias, 0)
+        return mask
+
+    def _masks(self):
+        """ Return dict of lower case enzyme name: bitmask of the results it or an isoschizomer cuts. """
+        if self._effective is None:
+            self._effective = {key: self._enzyme_mask(key) for key in self.masks}
+        return self._effective
+
+    def add(self, label, result):
+        """ Add (or replace) the result with this label. """
+        if label in self.bits:
+            self.remove(label)
+        bit = 1 << len(self.labels)
+        self.labels.append(label)
+        self.bits[label] = bit
+        self._effective = None
+        index = enzyme_index(result)
+        for key in index.cutter_keys:
+            self.masks[key] = self.masks.get(key, 0) | bit
+            self.names.setdefault(key, index.names[key])
+
+    def remove(self, label):
+        """ Remove the result with this label. """
+        bit = self.bits[label]
+        position = self.labels.index(label)
+        self._effective = None
+        low = bit - 1
+        for key, mask in list(self.masks.items()):
+            # Drop the bit and shift the higher bits down, keeping bits in label order:
+            mask = (mask & low) | ((mask >> 1) & ~low)
+            if mask:
+                self.masks[key] = mask
+            else:
+                del self.masks[key]
+                del self.names[key]
+        del self.labels[position]
+        self.bits = {label: 1 << i for i, label in enumerate(self.labels)}
+
+    def _mask(self, labels):
+        if labels is None:
+            return (1 << len(self.labels)) - 1
+        if isinstance(labels, str):
+            labels = [labels]
+        mask = 0
+        for label in labels:
+            mask |= self.bits[label]
+        return mask
+
+    def _labels(self, mask):
+        return [label for label in self.labels if mask & self.bits[label]]
+
+    def cutters(self, label):
+        """ Return frozenset of the enzymes that cut result <label>. """
+        bit = self.bits[label]
+        return frozenset(self.names[key] for key, mask in self._masks().items() if mask & bit)
+
+    def difference(self, a, b):
+        """ Return frozenset of the enzymes cutting result(s) a but not result(s) b (labels or lists of labels). """
+        mask_a, mask_b = self._mask(a), self._mask(b)
+        return frozenset(self.names[key] for key, mask in self._masks().items()
+                         if mask & mask_a == mask_a and not mask & mask_b)
+
+    def common(self, labels=None):
+        """ Return frozenset of the enzymes cutting all the results (default: all results in the table). """
+        wanted = self._mask(labels)
+        return frozenset(self.names[key] for key, mask in self._masks().items() if mask & wanted == wanted)
+
+    def union(self, labels=None):
+        """ Return frozenset of the enzymes cutting any of the results. """
+        wanted = self._mask(labels)
+        return frozenset(self.names[key] for key, mask in self._masks().items() if mask & wanted)
+
+    def unique(self, label):
+        """ Return frozenset of the enzymes that cut result <label> and none of the others. """
+        bit = self.bits[label]
+        return frozenset(self.names[key] for key, mask in self._masks().items() if mask == bit)
+
+    def cut_by(self, enzyme):
+        """ Return list of the labels of the results that <enzyme> cuts. """
+        return self._labels(self._enzyme_mask(enzyme))
+
+    def select(self, cut=(), uncut=()):
+        """ Return list of the labels of the results cut by all enzymes in <cut> and by none in <uncut>. """
+        mask = self._mask(None)
+        for enzyme in cut:
+            mask &= self._enzyme_mask(enzyme)
+        for enzyme in uncut:
+            mask &= ~self._enzyme_mask(enzyme)
+        return self._labels(mask)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Streaming export of Digest/MapSites results, and a compact binary result format.
+
+The exporters write one row at a time to a file handle (or path), so the table is never
+held in memory as one string (and for lazy digests, only one fragment sequence at a time):
+
+    digest.write_tsv(fd)            # same content as digest.tab_file(), plus a final newline
+    digest.write_csv("digest.csv")
+    restriction_map.write_jsonl(fd) # one JSON object (header: value) per row
+
+    restriction_map.dump("map.prrm")      # binary format, see below
+    restriction_map = load("map.prrm")    # MapSites (or Digest), without parsing any html
+
+Binary format (all integers little-endian; a "string" is a uint32 byte length followed by utf-8 bytes):
+
+    magic       4 bytes, b"PRRM"
+    version     uint8, currently 1
+    kind        uint8, 0 = Digest, 1 = MapSites
+    reserved    uint16, 0
+    n_headers   uint32, followed by n_headers strings (the column headers)
+    n_rows      uint32, followed by n_rows rows (row-major), each a uint32 field count followed by that
+                many strings. Rows can have fewer (or more) fields than there are headers, e.g. a
+                summary row spanning the columns of a sitefind table.
+    n_noncutters int32, followed by n_noncutters strings; -1 if the result has no noncutters list
+
+Rows are written as they are read, so dump streams like the text exporters.
+load raises ValueError for files that are truncated or corrupt (including a cut-off last string).
+"""
+
+import csv
+import json
+import struct
+
+
+MAGIC = b"PRRM"
+VERSION = 1
+KINDS = {0: "Digest", 1: "MapSites"}
+
+_header = struct.Struct("<4sBBH")
+_uint = struct.Struct("<I")
+_int = struct.Struct("<i")
+
+
+def _open(target, mode):
+    """ Return (file handle, close) for a path or an already open file. """
+    if hasattr(target, 'write') or hasattr(target, 'read'):
+        return target, False
+    return open(target, mode, **({} if 'b' in mode else {'encoding': 'utf-8', 'newline': ''})), True
+
+
+def write_tsv(result, target, include_header=True):
+    """ Write result as tab separated lines, one row at a time. """
+    fd, close = _open(target, "w")
+    try:
+        if include_header:
+            fd.write("\t".join(result.headers) + "\n")
+        for row in result.iter_rows():
+            fd.write("\t".join(row) + "\n")
+    finally:
+        if close:
+            fd.close()
+
+
+def write_csv(result, target, include_header=True, **kwargs):
+    """ Write result as CSV, one row at a time. kwargs are passed to csv.writer (e.g. dialect). """
+    fd, close = _open(target, "w")
+    try:
+        writer = csv.writer(fd, **kwargs)
+        if include_header:
+            writer.writerow(result.headers)
+        for row in result.iter_rows():
+            writer.writerow(row)
+    finally:
+        if close:
+            fd.close()
+
+
+def write_jsonl(result, target):
+    """ Write one JSON object ({header: value}) per row. """
+    fd, close = _open(target, "w")
+    headers = result.headers
+    try:
+        for row in result.iter_rows():
+            fd.write(json.dumps(dict(zip(headers, row))) + "\n")
+    finally:
+        if close:
+            fd.close()
+
+
+def _pack_strings(strings):
+    parts = []
+    for s in strings:
+        data = s.encode('utf-8')
+        parts.append(_uint.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def dump(result, target):
+    """ Write result (Digest or MapSites) in the binary format, see module docstring. """
+    from .map import MapSites
+    fd, close = _open(target, "wb")
+    try:
+        headers = list(result.headers)
+        fd.write(_header.pack(MAGIC, VERSION, 1 if isinstance(result, MapSites) else 0, 0))
+        fd.write(_uint.pack(len(headers)) + _pack_strings(headers))
+        fd.write(_uint.pack(result.total))
+        for row in result.iter_rows():
+            fd.write(_uint.pack(len(row)) + _pack_strings(row))
+        noncutters = result.Noncutters
+        if noncutters is None:
+            fd.write(_int.pack(-1))
+        else:
+            fd.write(_int.pack(len(noncutters)) + _pack_strings(noncutters))
+    finally:
+        if close:
+            fd.close()
+
+
+def load(source):
+    """ Read a result written by dump, and return it as a Digest or MapSites. """
+    from .parser import SitefindPage
+    from .digest import Digest
+    from .map import MapSites
+    fd, close = _open(source, "rb")
+    try:
+        data = memoryview(fd.read())
+    finally:
+        if close:
+            fd.close()
+    if len(data) < _header.size:
+        raise ValueError("Not a PRRM result file (too short).")
+    magic, version, kind, _ = _header.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a PRRM result file (bad magic %r)." % bytes(magic))
+    if version != VERSION or kind not in KINDS:
+        raise ValueError("Unsupported PRRM version %s / kind %s." % (version, kind))
+    offset = _header.size
+
+    def read_strings(count):
+        nonlocal offset
+        strings = []
+        for _ in range(count):
+            length, = _uint.unpack_from(data, offset)
+            offset += 4
+            if offset + length > len(data):
+                raise ValueError("Truncated PRRM result file (string at byte %s cut off)." % offset)
+            strings.append(str(data[offset:offset + length], 'utf-8'))
+            offset += length
+        return strings
+
+    def read_count(fmt=_uint):
+        nonlocal offset
+        count, = fmt.unpack_from(data, offset)
+        offset += 4
+        return count
+
+    try:
+        headers = read_strings(read_count())
+        n_rows = read_count()
+        rows = [read_strings(read_count()) for _ in range(n_rows)]
+        n_noncutters = read_count(_int)
+        noncutters = None if n_noncutters < 0 else read_strings(n_noncutters)
+    except struct.error:
+        raise ValueError("Truncated or corrupt PRRM result file.")
+    cls = MapSites if kind == 1 else Digest
+    return cls(SitefindPage(None, rows, noncutters), headers=headers)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Genome-scale restriction mapping of sequence files, with bounded memory.
+
+    for name, position in scan_genome("ecoli.fasta", {"enzymelist": ["EcoRI", "NotI"]}):
+        ...                                 # cut sites, one chunk at a time
+
+    cmap = map_genome("ecoli.fasta", {"DNAtype": "circular", "minlength": 6})   # columnar.ColumnarMap
+    cmap.to_map()                                                               # MapSites
+
+The file (raw sequence, or FASTA; the first record, or the one given by record=) is memory-mapped
+and never read into memory as a whole. It is scanned in chunks of chunk_size bytes: each chunk is
+upper-cased and stripped of line breaks, whitespace and numbers with one bytes.translate, and
+scanned with local.SiteScanner. The last (max site length - 1) bases of each chunk are carried
+over to the front of the next chunk, so sites spanning a chunk boundary are found; sites that lie
+completely in the carried-over bases were already reported by the previous chunk and are skipped.
+For circular sequences, the sites spanning the origin are found in a final junction chunk.
+
+SiteScanner matches the reverse complement of the non-palindromic sites on the top strand, so the
+reverse strand never has to be built, neither for the genome nor for a chunk.
+Peak memory is a few times chunk_size, plus the cut positions found.
+
+With processes > 1 (default: one per cpu for files of at least 4 chunks), the chunks are scanned
+by a process pool; each worker memory-maps the file itself, so only the chunk boundaries are sent
+to the workers and only the cut positions are sent back. The chunk boundaries in sequence
+coordinates are found by a quick first pass over the file.
+
+Positions are the number of bases 5' of the top strand cut, as for LocalRestMap.
+"""
+
+import mmap
+import os
+import string
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from .local import SiteScanner, default_enzymes, select_enzymes, make_map
+
+
+DEFAULT_CHUNK_SIZE = 1 << 22     # 4 MiB
+
+# Bytes that are not part of the sequence (line breaks, whitespace, numbers):
+FORMATTING = (string.whitespace + string.digits).encode('ascii')
+UPPER = bytes.maketrans(string.ascii_lowercase.encode('ascii'), string.ascii_uppercase.encode('ascii'))
+
+
+@lru_cache(maxsize=16)
+def _scanner(enzymes):
+    return SiteScanner(enzymes)
+
+
+def _clean(mm, start, end):
+    """ Return the upper-cased sequence bases in mm[start:end]. """
+    return mm[start:end].translate(UPPER, FORMATTING)
+
+
+def sequence_bounds(mm, record=None):
+    """
+    Return (start, end) byte offsets of the sequence in a memory-mapped file: the whole file
+    for raw sequence files, else the first FASTA record, or the record whose name (first word
+    of the header) is <record>.
+    """
+    if mm[:1] != b">":
+        if record is not None:
+            raise ValueError("Not a FASTA file, cannot select record %r." % (record,))
+        return 0, len(mm)
+    header = 0
+    while True:
+        header_end = mm.find(b"\n", header)
+        header_end = len(mm) if header_end < 0 else header_end + 1
+        name = mm[header + 1:header_end].split(None, 1)
+        if record is None or (name and name[0].decode('utf-8', 'replace') == record):
+            break
+        header = mm.find(b"\n>", header_end)
+        if header < 0:
+            raise ValueError("Record %r not found." % (record,))
+        header += 1
+    end = mm.find(b"\n>", header_end)
+    return header_end, len(mm) if end < 0 else end + 1
+
+
+def segments(mm, start, end, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Return (list of (byte start, byte end, sequence offset) chunks, sequence length)
+    for the sequence in mm[start:end].
+    """
+    chunks = []
+    offset = 0
+    for a in range(start, end, chunk_size):
+        b = min(a + chunk_size, end)
+        chunks.append((a, b, offset))
+        offset += len(mm[a:b].translate(None, FORMATTING))
+    return chunks, offset
+
+
+def _tail(mm, start, end, k):
+    """ Return the last k sequence bases in mm[start:end], reading backwards from end. """
+    size = 2 * k + 64
+    while True:
+        a = max(start, end - size)
+        bases = _clean(mm, a, end)
+        if len(bases) >= k or a == start:
+            return bases[-k:] if k else b""
+        size *= 2
+
+
+def _head(mm, start, end, k):
+    """ Return the first k sequence bases in mm[start:end]. """
+    size = 2 * k + 64
+    while True:
+        b = min(end, start + size)
+        bases = _clean(mm, start, b)
+        if len(bases) >= k or b == end:
+            return bases[:k]
+        size *= 2
+
+
+def _chunk_cuts(scanner, bases, carried, base, n, circular, end=None):
+    """
+    Yield (name, position) for the sites in bases (a chunk, with <carried> bases carried over from the
+    previous chunk in front), at sequence offset <base> (the offset of bases[0]), except for the sites
+    that lie completely in the carried-over bases, and (if end is given) those starting at bases[end:].
+    """
+    for enz, start, top, bottom in scanner.iter_sites(bases.decode('ascii', 'replace')):
+        if start + enz.length <= carried or (end is not None and start >= end):
+            continue
+        top, bottom = top + base, bottom + base
+        if circular:
+            top = top % n or n
+        elif not (0 < top < n and 0 <= bottom <= n):
+            continue
+        yield enz.name, top
+
+
+def _scan_chunk(path, seq_start, chunk, enzymes, n, circular):
+    """ Process pool worker: return list of (name, position) for one chunk of the file. """
+    scanner = _scanner(enzymes)
+    a, b, offset = chunk
+    with open(path, 'rb') as fd, mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        carry = _tail(mm, seq_start, a, scanner.MaxSiteLength - 1)
+        bases = carry + _clean(mm, a, b)
+    return list(_chunk_cuts(scanner, bases, len(carry), offset - len(carry), n, circular))
+
+
+def scan_genome(path, settings=None, enzymes=None, chunk_size=DEFAULT_CHUNK_SIZE, processes=None, record=None):
+    """
+    Yield (enzyme name, cut position) for all sites in a sequence file, chunk by chunk (see module docstring).
+    Cuts are in site order within each chunk, and the cuts of sites spanning the origin of circular
+    sequences come last. Several sites can give the same cut (e.g. on opposite strands), so a cut can
+    be yielded more than once.
+    Args:
+        path - raw sequence or FASTA file. Gzipped files cannot be memory-mapped, decompress them first.
+        settings - enzyme selection and DNAtype, as for get_map.
+        enzymes - enzyme table (dict of name: Enzyme), default is the bundled table.
+        chunk_size - chunk size in bytes.
+        processes - number of worker processes; None = one per cpu if the file has at least 4 chunks, else 1.
+        record - name of the FASTA record to scan (default: the first).
+    """
+    settings = settings or {}
+    circular = settings.get("DNAtype") == "circular"
+    selected = tuple(select_enzymes(enzymes if enzymes is not None else default_enzymes(), settings))
+    if not selected:
+        return
+    scanner = _scanner(selected)
+    overlap = scanner.MaxSiteLength - 1
+    if chunk_size <= overlap:
+        raise ValueError("chunk_size (%s) must be larger than the longest site (%s)." % (chunk_size, overlap + 1))
+    with open(path, 'rb') as fd:
+        if os.fstat(fd.fileno()).st_size == 0:
+            raise ValueError("Empty sequence file: %s" % path)
+        with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            seq_start, seq_end = sequence_bounds(mm, record)
+            chunks, n = segments(mm, seq_start, seq_end, chunk_size)
+            if n == 0:
+                raise ValueError("Empty sequence in %s" % path)
+            if len(chunks) == 1:
+                # Small sequence; the scanner handles the origin itself:
+                bases = _clean(mm, seq_start, seq_end).decode('ascii', 'replace')
+                for name, positions in scanner.scan(bases, circular).items():
+                    for pos in positions:
+                        yield name, pos
+                return
+            if processes is None:
+                processes = (os.cpu_count() or 1) if len(chunks) >= 4 else 1
+            if processes > 1:
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    futures = [executor.submit(_scan_chunk, path, seq_start, chunk, selected, n, circular)
+                               for chunk in chunks]
+                    for future in futures:
+                        for cut in future.result():
+                            yield cut
+            else:
+                carry = b""
+                for a, b, offset in chunks:
+                    bases = carry + _clean(mm, a, b)
+                    for cut in _chunk_cuts(scanner, bases, len(carry), offset - len(carry), n, circular):
+                        yield cut
+                    carry = bases[-overlap:] if overlap else b""
+            if circular:
+                # Junction chunk: the end of the sequence followed by its start. Only the sites spanning
+                # the origin are new; those completely in the tail or in the head were found above.
+                tail = _tail(mm, seq_start, seq_end, overlap)
+                head = _head(mm, seq_start, seq_end, overlap)
+                for name, pos in _chunk_cuts(scanner, tail + head, len(tail), n - len(tail), n, circular,
+                                             end=len(tail)):
+                    yield name, pos
+
+
+def map_genome(path, settings=None, enzymes=None, chunk_size=DEFAULT_CHUNK_SIZE, processes=None, record=None,
+               columnar=True):
+    """
+    Map a sequence file with scan_genome and return a columnar.ColumnarMap (or a MapSites if
+    columnar is False), with maxcuts and sorting applied from settings as for LocalRestMap.get_map.
+    Cut positions are collected in compact integer arrays.
+    """
+    settings = settings or {}
+    selected = select_enzymes(enzymes if enzymes is not None else default_enzymes(), settings)
+    found = {}
+    for name, pos in scan_genome(path, settings, enzymes, chunk_size, processes, record):
+        positions = found.get(name)
+        if positions is None:
+            positions = found[name] = array('l')
+        positions.append(pos)
+    cuts = {name: array('l', sorted(set(positions))) for name, positions in found.items()}
+    return make_map(cuts, selected, settings, columnar=columnar)
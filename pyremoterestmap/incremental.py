@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Incremental re-mapping after sequence edits.
+
+Instead of mapping the whole edited sequence again, remap takes the previous MapSites result,
+the sequence it was made from, and a list of edits, and only rescans the sequence around each edit
+(with the local enzyme table, see local.py). All other cuts are kept, shifted to the new coordinates.
+
+    result = remap(restriction_map, dna, [Edit(1200, 1, "A"),            # point mutation
+                                          Edit(3000, 0, "GAATTC"),       # insertion
+                                          Edit(5000, 12, "")],           # deletion
+                   settings={"DNAtype": "circular"})
+    result.map          # MapSites for the edited sequence
+    result.sequence     # the edited sequence
+    result.gained       # {"EcoRI": [3001], ...}  new cuts (new coordinates)
+    result.lost         # {"BamHI": [1198], ...}  cuts that are gone (old coordinates)
+
+Edits are (position, delete, insert): delete <delete> bases starting at the 0-based <position>,
+and insert <insert> there. All edit positions refer to the original sequence and edits must not overlap.
+
+A site can only be affected by an edit if its recognition sequence or one of its cuts is within
+reach R of the edit, where R is the largest distance from a site start to its end or cuts
+(the max site length, or more for enzymes that cut outside their site). So for each edit,
+cuts within 2R of the edit are dropped and found again by scanning the edited sequence 3R around
+the edit; cuts further away are only shifted. A 1 bp change thus costs a scan of a few hundred bases,
+plus rebuilding the MapSites.
+
+The previous map must have been made with the same settings, and without maxcuts (maxcuts is applied
+to the result). Enzymes selected by settings that are neither in the map nor in its noncutters list
+are mapped over the whole sequence.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from .local import SiteScanner, default_enzymes, select_enzymes, make_map, map_cuts
+
+
+Edit = namedtuple("Edit", ["position", "delete", "insert"])
+
+Remap = namedtuple("Remap", ["map", "sequence", "gained", "lost"])
+
+
+@lru_cache(maxsize=16)
+def _scanner(enzymes):
+    return SiteScanner(enzymes)
+
+
+def enzyme_reach(enzymes):
+    """ Return the largest distance from a site start to the end of the site or to any of its cuts (either strand). """
+    reach = 0
+    for enz in enzymes:
+        length = enz.length
+        offsets = (length, enz.cut5, enz.cut3, length - enz.cut3, length - enz.cut5)
+        reach = max(reach, max(offsets), -min(offsets))
+    return reach
+
+
+def map_position(position, edits):
+    """
+    Return the new coordinate of cut <position> after edits (sorted by position), or None if the
+    cut position was deleted. Cuts at or before an edit are unchanged, cuts after it are shifted.
+    """
+    shift = 0
+    for pos, delete, insert in edits:
+        if position <= pos:
+            break
+        if position < pos + delete:
+            return None
+        shift += len(insert) - delete
+    return position + shift
+
+
+def _check_edits(edits, n):
+    edits = sorted(Edit(int(pos), int(delete), insert.upper()) for pos, delete, insert in edits)
+    end = 0
+    for pos, delete, _ in edits:
+        if pos < end or delete < 0 or pos + delete > n:
+            raise ValueError("Edits must be inside the sequence and must not overlap: %s" % (edits,))
+        end = pos + delete
+    return edits
+
+
+def _apply_edit(cuts, sequence, edit, scanner, reach, circular):
+    """ Apply one edit to sequence and cuts (dict of name: set of positions). Returns the new sequence. """
+    pos, delete, insert = edit
+    n = len(sequence)
+    delta = len(insert) - delete
+    new_sequence = sequence[:pos] + insert + sequence[pos + delete:]
+    new_n = len(new_sequence)
+    zone_start = pos - 2 * reach
+    old_zone, new_zone = delete + 4 * reach, len(insert) + 4 * reach
+    window_start, window_end = pos - 3 * reach, pos + len(insert) + 4 * reach
+
+    if circular and (old_zone >= n or window_end - window_start >= new_n):
+        # The edit affects most of the (small) sequence; map it all:
+        found = scanner.scan(new_sequence, circular)
+        cuts.clear()
+        cuts.update((name, set(positions)) for name, positions in found.items())
+        return new_sequence
+
+    def in_zone(c, length, size):
+        offset = c - zone_start
+        if circular:
+            offset %= size
+        return 0 <= offset <= length
+
+    # Drop the cuts near the edit and shift the cuts after it:
+    for name, positions in cuts.items():
+        cuts[name] = {c + delta if c >= pos + delete else c for c in positions if not in_zone(c, old_zone, n)}
+
+    # Rescan around the edit, keeping only cuts in the zone that was dropped:
+    if circular:
+        start = window_start % new_n
+        window = (new_sequence + new_sequence)[start:start + window_end - window_start]
+    else:
+        start = max(window_start, 0)
+        window = new_sequence[start:min(window_end, new_n)]
+    for enz, _, top, bottom in scanner.iter_sites(window):
+        top, bottom = top + start, bottom + start
+        if circular:
+            top = top % new_n or new_n
+        elif not (0 < top < new_n and 0 <= bottom <= new_n):
+            continue
+        if in_zone(top, new_zone, new_n):
+            cuts.setdefault(enz.name, set()).add(top)
+    return new_sequence
+
+
+def remap(restriction_map, sequence, edits, settings=None, enzymes=None):
+    """
+    Return Remap(map, sequence, gained, lost) for the sequence after edits, see module docstring.
+    Args:
+        restriction_map - MapSites for sequence (made without maxcuts).
+        sequence - the sequence the map was made from.
+        edits - list of Edit (or (position, delete, insert) tuples), in original sequence coordinates.
+        settings - the settings used for the map (as for get_map).
+        enzymes - enzyme table (dict of name: Enzyme), default is the bundled table.
+    """
+    settings = settings or {}
+    circular = settings.get("DNAtype") == "circular"
+    sequence = sequence.upper()
+    selected = select_enzymes(enzymes if enzymes is not None else default_enzymes(), settings)
+    known = {enz.name for enz in selected}
+    old_cuts = map_cuts(restriction_map)
+    unknown = sorted(name for name in old_cuts if name not in known)
+    if unknown:
+        raise ValueError("Enzymes in the map are not in the enzyme table (or not selected by settings): %s"
+                         % ", ".join(unknown))
+    edits = _check_edits(edits, len(sequence))
+
+    cuts = {name: set(positions) for name, positions in old_cuts.items()}
+    scanner = _scanner(tuple(selected))
+    reach = enzyme_reach(selected)
+    # Apply the last edit first, so the positions of the other edits remain valid:
+    new_sequence = sequence
+    for edit in reversed(edits):
+        new_sequence = _apply_edit(cuts, new_sequence, edit, scanner, reach, circular)
+
+    # Enzymes not in the map at all (nor listed as noncutters) are mapped in full:
+    listed = set(old_cuts) | set(restriction_map.Noncutters or [])
+    missing = [enz for enz in selected if enz.name not in listed]
+    if missing:
+        for name, positions in _scanner(tuple(missing)).scan(new_sequence, circular).items():
+            cuts[name] = set(positions)
+
+    # Diff, by mapping the old cuts to the new coordinates. Enzymes that were mapped in full because
+    # they were missing from the map have no diff:
+    gained, lost = {}, {}
+    for name in (set(old_cuts) | set(cuts)).difference(enz.name for enz in missing):
+        old = old_cuts.get(name, [])
+        new = cuts.get(name, set())
+        mapped = [map_position(c, edits) for c in old]
+        lost_cuts = [c for c, m in zip(old, mapped) if m not in new]
+        gained_cuts = sorted(new.difference(mapped))
+        if lost_cuts:
+            lost[name] = lost_cuts
+        if gained_cuts:
+            gained[name] = gained_cuts
+
+    new_map = make_map({name: sorted(positions) for name, positions in cuts.items() if positions}, selected, settings)
+    return Remap(new_map, new_sequence, gained, lost)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Positional index over the cut sites of a restriction map.
+
+    index = restriction_map.cut_index(length=len(dna), circular=True)
+    index.window(100, 500)              # [(pos, enzyme), ...] for all cuts in [100, 500]
+    index.nearest(1234)                 # (pos, [enzymes], distance) of the nearest cut
+    index.unique_cutters(100, 500)      # enzymes that cut the whole sequence once, inside [100, 500]
+    index.single_cutters(100, 500)      # enzymes that cut exactly once inside [100, 500]
+    index.noncutters_in(100, 500)       # enzymes (in the map) that do not cut inside [100, 500]
+
+All cut positions are kept in one sorted array (plus a parallel array of enzyme numbers),
+and each enzyme's cuts in its own sorted array, so all queries use binary search (bisect):
+window and unique-cutter queries are O(log n + k) for k hits, nearest is O(log n), and the
+per-enzyme queries are O(E log n) for E enzymes.
+
+Windows are inclusive. For circular sequences, a window with start > end wraps around the origin,
+e.g. window(9500, 200) on a 10 kb plasmid, and distances are measured the short way around.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class CutIndex(object):
+    """
+    Sorted index of all cut positions in a MapSites (or columnar.ColumnarMap) result.
+    Args:
+        restriction_map - the MapSites or ColumnarMap.
+        length - length of the mapped sequence (required for circular sequences).
+        circular - whether the sequence is circular.
+    """
+
+    def __init__(self, restriction_map, length=None, circular=False):
+        if circular and not length:
+            raise ValueError("The sequence length is required for circular sequences.")
+        self.Length = length
+        self.Circular = circular
+        if hasattr(restriction_map, 'enzyme_cuts'):
+            # columnar.ColumnarMap
+            self.names = list(restriction_map.names)
+            self.enzyme_cuts = [array('l', sorted(restriction_map.enzyme_cuts(i))) for i in range(len(self.names))]
+        else:
+            self.names = [row['NAME'] for row in restriction_map.dictrows]
+            self.enzyme_cuts = [array('l', sorted(set(int(pos) for pos in row['CUTPOS'] if pos)))
+                                for row in restriction_map.dictrows]
+        self.name_index = {name: i for i, name in enumerate(self.names)}
+        merged = sorted((pos, i) for i, cuts in enumerate(self.enzyme_cuts) for pos in cuts)
+        self.positions = array('l', (pos for pos, _ in merged))
+        self.enzymes = array('l', (i for _, i in merged))
+        # Cut positions of enzymes that cut the sequence exactly once:
+        unique = sorted((cuts[0], i) for i, cuts in enumerate(self.enzyme_cuts) if len(cuts) == 1)
+        self.unique_positions = array('l', (pos for pos, _ in unique))
+        self.unique_enzymes = array('l', (i for _, i in unique))
+
+    def _ranges(self, start, end):
+        """ Return list of (start, end) linear ranges for a (possibly wrapping) window. """
+        if start <= end:
+            return [(start, end)]
+        if not self.Circular:
+            raise ValueError("start > end is only allowed for circular sequences.")
+        return [(start, self.Length), (1, end)]
+
+    def _count(self, cuts, start, end):
+        return sum(bisect_right(cuts, e) - bisect_left(cuts, s) for s, e in self._ranges(start, end))
+
+    def window(self, start, end):
+        """ Return list of (position, enzyme name) for all cuts in [start, end], in position order. """
+        hits = []
+        for s, e in self._ranges(start, end):
+            lo, hi = bisect_left(self.positions, s), bisect_right(self.positions, e)
+            hits.extend((self.positions[i], self.names[self.enzymes[i]]) for i in range(lo, hi))
+        return hits
+
+    def distance(self, a, b):
+        """ Distance between two positions (the short way around, for circular sequences). """
+        d = abs(a - b)
+        return min(d, self.Length - d) if self.Circular else d
+
+    def nearest(self, position, enzyme=None):
+        """
+        Return (cut position, [enzyme names], distance) for the cut nearest to position,
+        optionally only considering cuts by <enzyme>. Returns None if there are no cuts.
+        """
+        cuts = self.enzyme_cuts[self.name_index[enzyme]] if enzyme else self.positions
+        if not cuts:
+            return None
+        i = bisect_left(cuts, position)
+        candidates = {cuts[j] for j in (i - 1, i) if 0 <= j < len(cuts)}
+        if self.Circular:
+            # The nearest cut may be on the other side of the origin:
+            candidates.update((cuts[0], cuts[-1]))
+        best = min(candidates, key=lambda pos: (self.distance(pos, position), pos))
+        if enzyme:
+            names = [enzyme]
+        else:
+            lo, hi = bisect_left(self.positions, best), bisect_right(self.positions, best)
+            names = [self.names[self.enzymes[j]] for j in range(lo, hi)]
+        return best, names, self.distance(best, position)
+
+    def count(self, enzyme, start, end):
+        """ Return the number of cuts by <enzyme> in [start, end]. """
+        return self._count(self.enzyme_cuts[self.name_index[enzyme]], start, end)
+
+    def unique_cutters(self, start, end):
+        """ Return names of the enzymes that cut the sequence exactly once, with that cut inside [start, end]. """
+        hits = []
+        for s, e in self._ranges(start, end):
+            lo, hi = bisect_left(self.unique_positions, s), bisect_right(self.unique_positions, e)
+            hits.extend(self.names[self.unique_enzymes[i]] for i in range(lo, hi))
+        return hits
+
+    def single_cutters(self, start, end):
+        """ Return names of the enzymes that cut exactly once inside [start, end] (and maybe elsewhere). """
+        return [name for name, cuts in zip(self.names, self.enzyme_cuts) if self._count(cuts, start, end) == 1]
+
+    def noncutters_in(self, start, end):
+        """
+        Return names of the enzymes in the map that do not cut inside [start, end].
+        Note that enzymes that do not cut the sequence at all are not in the map (see MapSites.Noncutters).
+        """
+        return [name for name, cuts in zip(self.names, self.enzyme_cuts) if not self._count(cuts, start, end)]
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Offline restriction site mapping, without sitefind.pl.
+
+    from pyremoterestmap.local import LocalRestMap
+    request = LocalRestMap(dna)
+    restriction_map = request.get_map({"DNAtype": "circular", "maxcuts": "2", "enzymetype": "NEB"})
+
+LocalRestMap has the same get_map and get_digest interface as RemoteRestMap and returns the same MapSites object
+(NAME, SITE, LENGTH, CUTNUMBER, OVERHANG, CUTLIST columns, and CUTPOS in dictrows), but computes
+it locally from an enzyme table. The bundled table (data/enzymes.tsv) covers common commercial
+enzymes; use load_enzymes(path) to read your own table in the same format.
+
+digest_sequence computes the fragments of a virtual digest directly from cut positions,
+e.g. taken from a (remote or local) MapSites result, without asking the server:
+
+    digest = digest_sequence(dna, map_cuts(restriction_map, ["EcoRI", "PstI"]), circular=True)
+
+All enzymes are scanned in a single pass over the sequence with one combined regular expression,
+which also includes the reverse complement of all non-palindromic sites, so both strands are
+scanned at once.
+
+Cut positions are given as the number of bases 5' of the top strand cut, i.e. a cut between
+base 10 and 11 (1-based) is reported as 10.
+"""
+
+import os
+import re
+from collections import namedtuple, OrderedDict
+
+from .parser import SitefindPage
+from .digest import Digest
+from .map import MapSites, sort_rows
+from .columnar import ColumnarMap
+
+
+ENZYME_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "enzymes.tsv")
+
+IUPAC = {
+    "A": "A", "C": "C", "G": "G", "T": "T",
+    "R": "AG", "Y": "CT", "M": "AC", "K": "GT", "S": "CG", "W": "AT",
+    "H": "ACT", "B": "CGT", "V": "ACG", "D": "AGT", "N": "ACGT",
+}
+
+COMPLEMENT = str.maketrans("ACGTRYMKSWHBVDN", "TGCAYRKMSWDVBHN")
+
+
+def reverse_complement(seq):
+    """ Return the reverse complement of a (IUPAC) DNA sequence. """
+    return seq.upper().translate(COMPLEMENT)[::-1]
+
+
+def site_regex(site):
+    """ Return regular expression (string) matching the IUPAC recognition site. """
+    return "".join(base if len(IUPAC[base]) == 1 else "[%s]" % IUPAC[base] for base in site.upper())
+
+
+class Enzyme(namedtuple("Enzyme", ["name", "site", "cut5", "cut3", "suppliers", "prototype"])):
+    """
+    A restriction enzyme, as read from the enzyme table.
+    cut5/cut3 are the top/bottom strand cut positions, relative to the start of the site.
+    prototype is the name of the first enzyme in the table with the same site.
+    """
+    __slots__ = ()
+
+    @property
+    def overhang(self):
+        if self.cut5 < self.cut3:
+            return "five_prime"
+        elif self.cut5 > self.cut3:
+            return "three_prime"
+        return "blunt"
+
+    @property
+    def length(self):
+        return len(self.site)
+
+    @property
+    def is_palindrome(self):
+        return reverse_complement(self.site) == self.site.upper()
+
+
+def load_enzymes(path=None):
+    """
+    Load enzyme table (tab separated NAME, SITE, CUT5, CUT3, SUPPLIERS; # comments)
+    and return an OrderedDict of name: Enzyme. Default is the bundled table.
+    """
+    enzymes = OrderedDict()
+    prototypes = {}
+    with open(path or ENZYME_TABLE) as fd:
+        for line in fd:
+            if not line.strip() or line.startswith("#") or line.startswith("NAME\t"):
+                continue
+            name, site, cut5, cut3, suppliers = (line.rstrip("\n").split("\t") + [""])[:5]
+            site = site.upper()
+            # The site is the same whichever strand it is written on:
+            canonical = min(site, reverse_complement(site))
+            prototype = prototypes.setdefault(canonical, name)
+            enzymes[name] = Enzyme(name, site, int(cut5), int(cut3), suppliers, prototype)
+    return enzymes
+
+
+_default_enzymes = None
+
+def default_enzymes():
+    """ Return the bundled enzyme table (loaded once). """
+    global _default_enzymes
+    if _default_enzymes is None:
+        _default_enzymes = load_enzymes()
+    return _default_enzymes
+
+
+class SiteScanner(object):
+    """
+    Scans a sequence for the sites of many enzymes at once.
+    A single combined pattern, (?=site1|site2|...), finds the positions where at least one
+    enzyme binds (on either strand). At those positions, the enzymes whose site starts with
+    the k-mer found at the position are looked up in a dict and checked, so overlapping sites
+    of different enzymes are all found without testing every enzyme at every position.
+    """
+
+    def __init__(self, enzymes):
+        if isinstance(enzymes, dict):
+            enzymes = list(enzymes.values())
+        self.Enzymes = list(enzymes)
+        # (site, enzyme, is_reverse_strand) for both strands:
+        sites = []
+        for enz in self.Enzymes:
+            sites.append((enz.site, enz, False))
+            if not enz.is_palindrome:
+                sites.append((reverse_complement(enz.site), enz, True))
+        self.MaxSiteLength = max((enz.length for enz in self.Enzymes), default=0)
+        self.K = k = min((enz.length for enz in self.Enzymes), default=0)
+        self.Pattern = re.compile("(?=%s)" % "|".join(site_regex(site) for site, _, _ in sites)) if sites else None
+        # k-mer -> list of (compiled site pattern, enzyme, is_reverse_strand) for sites starting with the k-mer.
+        self.prefixes = {}
+        for site, enz, reverse in sites:
+            entry = (re.compile(site_regex(site)), enz, reverse)
+            kmers = [""]
+            for base in site[:k]:
+                kmers = [kmer + b for kmer in kmers for b in IUPAC[base]]
+            for kmer in kmers:
+                self.prefixes.setdefault(kmer, []).append(entry)
+
+    def iter_sites(self, sequence, circular=False):
+        """
+        Yield (enzyme, start, top_cut, bottom_cut) for every recognition site in sequence.
+        Positions are 0-based, in the top strand coordinates. For circular sequences,
+        sites spanning the origin are included (cuts may then be >= len(sequence)).
+        """
+        if self.Pattern is None:
+            return
+        sequence = sequence.upper()
+        n = len(sequence)
+        if circular and n:
+            sequence = sequence + sequence[:self.MaxSiteLength - 1]
+        k = self.K
+        prefixes = self.prefixes
+        for match in self.Pattern.finditer(sequence):
+            start = match.start()
+            if start >= n:
+                break
+            for pattern, enz, reverse in prefixes.get(sequence[start:start+k], ()):
+                if not pattern.match(sequence, start):
+                    continue
+                if reverse:
+                    yield enz, start, start + enz.length - enz.cut3, start + enz.length - enz.cut5
+                else:
+                    yield enz, start, start + enz.cut5, start + enz.cut3
+
+    def scan(self, sequence, circular=False):
+        """
+        Return dict of enzyme name: sorted list of unique cut positions (as defined in the module docstring).
+        Enzymes that do not cut are not included.
+        For linear sequences, sites where the enzyme would cut outside the sequence are ignored.
+        """
+        n = len(sequence)
+        cuts = {}
+        for enz, _, top, bottom in self.iter_sites(sequence, circular):
+            if circular:
+                top = top % n or n
+            elif not (0 < top < n and 0 <= bottom <= n):
+                continue
+            cuts.setdefault(enz.name, set()).add(top)
+        return {name: sorted(positions) for name, positions in cuts.items()}
+
+
+def select_enzymes(enzymes, settings):
+    """
+    Return list of enzymes matching the selection criteria in settings
+    (enzymelist, or minlength, overhang, enzymetype and isoschizomers).
+    maxcuts is applied after mapping.
+    """
+    if isinstance(enzymes, dict):
+        enzymes = list(enzymes.values())
+    enzymelist = settings.get("enzymelist")
+    if enzymelist:
+        # The enzyme list overrides all other selection criteria:
+        wanted = {name.lower() for name in enzymelist}
+        return [enz for enz in enzymes if enz.name.lower() in wanted]
+    minlength = int(settings.get("minlength") or 0)
+    overhang = settings.get("overhang") or ["five_prime", "three_prime", "blunt"]
+    if isinstance(overhang, str):
+        overhang = [overhang]
+    neb_only = settings.get("enzymetype") == "NEB"
+    prototypes_only = settings.get("isoschizomers") == "no"
+    return [enz for enz in enzymes
+            if enz.length >= minlength
+            and enz.overhang in overhang
+            and (not neb_only or "N" in enz.suppliers)
+            and (not prototypes_only or enz.prototype == enz.name)]
+
+
+def make_map(cuts, enzymes, settings, noncutters=None, columnar=False):
+    """
+    Return a MapSites from a dict of enzyme name: cut positions,
+    for the selected enzymes (as returned by select_enzymes).
+    Applies maxcuts and sorts the rows according to settings.
+    If columnar is True, a columnar.ColumnarMap is returned instead (built without string rows).
+    """
+    maxcuts = settings.get("maxcuts", "all")
+    maxcuts = None if maxcuts in (None, "all") else int(maxcuts)
+    if noncutters is None:
+        noncutters = [enz.name for enz in enzymes if not cuts.get(enz.name)]
+    if columnar:
+        # Sort the enzymes by the same keys as the rows, using a light-weight stand-in row:
+        cutters = [enz for enz in enzymes if cuts.get(enz.name)
+                   and (maxcuts is None or len(cuts[enz.name]) <= maxcuts)]
+        order = sort_rows([[enz.name, enz.site, enz.length, len(cuts[enz.name]), enz.overhang, i]
+                           for i, enz in enumerate(cutters)], settings)
+        return ColumnarMap.from_cuts(cuts, [cutters[row[5]] for row in order], noncutters)
+    rows = []
+    for enz in enzymes:
+        positions = cuts.get(enz.name)
+        if not positions or (maxcuts is not None and len(positions) > maxcuts):
+            continue
+        rows.append([enz.name, enz.site, str(enz.length), str(len(positions)), enz.overhang,
+                     ", ".join(str(pos) for pos in positions)])
+    rows = sort_rows(rows, settings)
+    return MapSites(SitefindPage("Restriction Map", rows, noncutters), headers="standard")
+
+
+def map_cuts(restriction_map, enzymelist=None):
+    """
+    Return dict of enzyme name: list of (int) cut positions from a MapSites result,
+    optionally only for the enzymes in enzymelist (case insensitive).
+    """
+    wanted = {name.lower() for name in enzymelist} if enzymelist else None
+    return {row['NAME']: [int(pos) for pos in row['CUTPOS'] if pos]
+            for row in restriction_map.dictrows
+            if wanted is None or row['NAME'].lower() in wanted}
+
+
+def digest_sequence(sequence, cuts, circular=False, noncutters=None, lazy=False):
+    """
+    Virtual digest of sequence, using the cut positions in <cuts>, which can be a dict of
+    enzyme name: cut positions (e.g. from LocalRestMap.get_cuts or map_cuts) or a MapSites result
+    (all enzymes in the map are used, see map_cuts to select a subset).
+    Returns a Digest with the standard columns:
+        LENGTH, START_ENZ, FIVE_PRIME, END_ENZ, THREE_PRIME, SEQUENCE
+    FIVE_PRIME and THREE_PRIME are the 1-based positions of the first and last base of the fragment
+    (top strand), START_ENZ/END_ENZ the enzyme(s) that made the cut ("" for the ends of a linear sequence).
+    For circular sequences the fragment spanning the origin is included (and THREE_PRIME < FIVE_PRIME).
+    Fragments are listed in sequence order. Runs in O(m log m) for m cuts.
+    If lazy is True, the Digest only keeps a reference to the sequence and the fragment offsets,
+    and fragment sequences are sliced on access (see Digest.fragment_sequence). sequence may then
+    also be a bytes-like buffer (assumed upper case), to get memoryviews instead of copies.
+    """
+    if not isinstance(cuts, dict):
+        cuts = map_cuts(cuts)
+    if isinstance(sequence, str):
+        sequence = sequence.upper()
+    n = len(sequence)
+    # Merge all cut lists; several enzymes can cut at the same position:
+    enzymes_at = {}
+    for name, positions in cuts.items():
+        for pos in positions:
+            pos = pos % n or n if circular else pos
+            if 0 < pos <= n:
+                enzymes_at.setdefault(pos, []).append(name)
+    positions = sorted(pos for pos in enzymes_at if circular or pos < n)
+    if not positions:
+        raise ValueError("No Cut Sites")
+    names = {pos: "/".join(enzymes_at[pos]) for pos in positions}
+    if circular:
+        # Each fragment runs from one cut to the next, the last one wrapping around the origin:
+        bounds = list(zip(positions, positions[1:] + [positions[0] + n]))
+    else:
+        bounds = list(zip([0] + positions, positions + [n]))
+    rows = []
+    for start, end in bounds:
+        row = [str(end - start), names.get(start, ""), str(start % n + 1),
+               names.get(end if end <= n else end - n, ""), str(end - n if end > n else end)]
+        if not lazy:
+            row.append(sequence[start:] + sequence[:end - n] if end > n else sequence[start:end])
+        rows.append(row)
+    if noncutters is None:
+        noncutters = [name for name, positions in cuts.items() if not positions]
+    page = SitefindPage("Virtual Digest", rows, noncutters)
+    if lazy:
+        return Digest(page, headers="standard", parent=sequence, offsets=bounds)
+    return Digest(page, headers="standard")
+
+
+class LocalRestMap(object):
+    """
+    Offline counterpart to RemoteRestMap.
+    Args:
+        sequence - the DNA sequence.
+        settings - default settings, same as for RemoteRestMap.get_map.
+        enzymes - dict of name: Enzyme (see load_enzymes). Default is the bundled table.
+    """
+
+    def __init__(self, sequence, settings=None, enzymes=None):
+        self.Sequence = sequence.upper()
+        self.Settings = settings or {}
+        self.Enzymes = enzymes if enzymes is not None else default_enzymes()
+        self._scanners = {}
+
+    def scanner(self, enzymes):
+        """ Return (cached) SiteScanner for a list of enzymes. """
+        key = tuple(enz.name for enz in enzymes)
+        if key not in self._scanners:
+            self._scanners[key] = SiteScanner(enzymes)
+        return self._scanners[key]
+
+    def get_cuts(self, settings=None):
+        """ Return dict of enzyme name: sorted cut positions, for the enzymes selected by settings. """
+        settings = dict(self.Settings, **(settings or {}))
+        enzymes = select_enzymes(self.Enzymes, settings)
+        return self.scanner(enzymes).scan(self.Sequence, settings.get("DNAtype") == "circular")
+
+    def get_map(self, settings=None, columnar=False):
+        """
+        Map the sequence. Takes the same settings as RemoteRestMap.get_map and returns a MapSites,
+        or a columnar.ColumnarMap if columnar is True.
+        """
+        settings = dict(self.Settings, **(settings or {}))
+        enzymes = select_enzymes(self.Enzymes, settings)
+        cuts = self.scanner(enzymes).scan(self.Sequence, settings.get("DNAtype") == "circular")
+        return make_map(cuts, enzymes, settings, columnar=columnar)
+
+    def get_digest(self, settings=None, lazy=False):
+        """
+        Virtual digest of the sequence with the enzymes in settings["enzymelist"] (required).
+        Takes the same settings as RemoteRestMap.get_digest and returns a Digest.
+        If lazy is True, fragment sequences are sliced from the sequence on access, see digest_sequence.
+        """
+        settings = dict(self.Settings, **(settings or {}))
+        if not settings.get("enzymelist"):
+            raise ValueError("get_digest requires a non-empty enzymelist.")
+        enzymes = select_enzymes(self.Enzymes, settings)
+        cuts = self.scanner(enzymes).scan(self.Sequence, settings.get("DNAtype") == "circular")
+        noncutters = [enz.name for enz in enzymes if not cuts.get(enz.name)]
+        return digest_sequence(self.Sequence, cuts, settings.get("DNAtype") == "circular", noncutters, lazy)
@@ -95,23 +95,43 @@ total - Returns the total number of rows in the table.
 from .digest import Digest
 
 
+# Sort keys for the sitefind "first", "second" and "third" settings, for rows in standard header order:
+OVERHANG_ORDER = {"five_prime": 0, "three_prime": 1, "blunt": 2}
+SORT_KEYS = {
+    "frequency": lambda row: int(row[3]),
+    "name": lambda row: row[0].lower(),
+    "overhang": lambda row: OVERHANG_ORDER.get(row[4], len(OVERHANG_ORDER)),
+    "site_length": lambda row: -int(row[2]),     # Longest sites first.
+}
+
+
+def sort_rows(rows, settings):
+    """
+    Sort map rows (in standard header order) by the "first", "second" and "third" settings.
+    Frequency is sorted ascending (fewest cuts first), site length descending, names alphabetically,
+    and overhangs as five_prime, three_prime, blunt. The sort is stable. Unknown sort keys are ignored.
+    """
+    keys = [SORT_KEYS[settings[order]] for order in ("first", "second", "third")
+            if settings.get(order) in SORT_KEYS]
+    if not keys:
+        return list(rows)
+    return sorted(rows, key=lambda row: tuple(key(row) for key in keys))
+
+
 class MapSites(Digest):
     """
     Represents the result of a "map sites" action on http://www.restrictionmapper.org/
     """
-    def __init__(self, ):
-        pass
-
     def standard_headers(self):
         return ["NAME", "SITE", "LENGTH", "CUTNUMBER", "OVERHANG", "CUTLIST"]
 
 
-    def parse_rows(self, rows, headers):
+    def parse_rows(self, rows=None, headers=None):
         if rows is None:
             rows = self.rows
         if headers is None:
             headers = self.headers
-        dictrows = (dict(zip(headers, row)) for row in rows)
+        dictrows = [dict(zip(headers, row)) for row in rows]
         for d in dictrows:
             d['CUTPOS'] = [enz.strip() for enz in d[headers[5]].split(",")]
         # Original lib also does an aggregation of cuts and other stuff, but I wait with this until it is asked for.
@@ -124,4 +144,25 @@ class MapSites(Digest):
         duplicate cuts from different enzymes, so that the number of cuts in this list
         may be smaller than you expect.
         """
-        return sorted(set(cutpos for row in self.dictrows for cutpos in row['CUTPOS']))
+        return sorted(set(int(cutpos) for row in self.dictrows for cutpos in row['CUTPOS'] if cutpos))
+
+    def cut_index(self, length=None, circular=False):
+        """
+        Return a positional index (index.CutIndex) over all cut positions, for window,
+        nearest-cut and unique-cutter queries. The index is built once and reused.
+        length (the sequence length) is required for circular sequences.
+        """
+        key = (length, circular)
+        if getattr(self, '_cut_index', None) is None or self._cut_index[0] != key:
+            from .index import CutIndex
+            self._cut_index = (key, CutIndex(self, length, circular))
+        return self._cut_index[1]
+
+    def to_columnar(self):
+        """ Return the result in compact, columnar form, see columnar.ColumnarMap. """
+        from .columnar import ColumnarMap
+        return ColumnarMap.from_map(self)
+
+
+# The name used by the original library (RemoteRestMap::Map):
+Map = MapSites
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Per-request timing and metrics.
+
+Every get_map/get_digest call on a RemoteRestMap produces a RequestMetrics record,
+which is added to the request's RequestStats (request.Stats) and passed to its hooks:
+
+    stats = RequestStats()
+    stats.add_hook(lambda m: statsd.timing("sitefind.ttfb", m.ttfb) if m.fetched else None)
+    request = RemoteRestMap(url, dna, stats=stats)     # share stats between instances to aggregate
+    ...
+    stats.summary()["total_time"]   # {'count': 120, 'mean': .., 'p50': .., 'p90': .., 'p99': .., 'max': ..}
+
+RequestMetrics fields (times in seconds, sizes in bytes, None if not applicable):
+    method - "map" or "digest".
+    url, sequence_length
+    fetched - True if this call made the http request, False if the result came from the cache,
+        a concurrent identical call (SingleFlight), or was merged from window requests (chunked maps).
+    payload_bytes - size of the posted form.
+    status - http status code.
+    ttfb - time from sending the request until the response headers were received.
+    transfer_time - time to read the response body.
+    response_bytes - size of the response body.
+    parse_time - time to parse the html (and detect error pages).
+    build_time - time to build the Digest/MapSites from the parsed page.
+    rows, noncutters - number of table rows and noncutters in the result.
+    total_time - wall time of the whole get_map/get_digest call.
+    error - "ExceptionType: message" if the call failed.
+    retries - number of retried requests (see control.HostController); ttfb etc. are for the last attempt.
+
+The timing percentiles are computed over the last <window> records.
+"""
+
+import threading
+import warnings
+from collections import namedtuple, deque
+
+
+RequestMetrics = namedtuple("RequestMetrics", [
+    "method", "url", "sequence_length", "fetched", "payload_bytes", "status", "ttfb", "transfer_time",
+    "response_bytes", "parse_time", "build_time", "rows", "noncutters", "total_time", "error", "retries"])
+
+TIMINGS = ("total_time", "ttfb", "transfer_time", "parse_time", "build_time")
+
+
+def percentile(values, q):
+    """ Return the q'th percentile (0-100) of a sorted list, by linear interpolation. """
+    if not values:
+        return None
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+class RequestStats(object):
+    """
+    Aggregates RequestMetrics (counts, sizes and timing percentiles) and calls hooks for each record.
+    Thread-safe; can be shared by any number of RemoteRestMap instances.
+    Args:
+        window - number of recent records used for the timing percentiles.
+        hooks - callables, called as hook(metrics) for each RequestMetrics.
+    """
+
+    def __init__(self, window=10000, hooks=None):
+        self._lock = threading.Lock()
+        self.Hooks = list(hooks or [])
+        self.Window = window
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.fetched = 0
+            self.errors = 0
+            self.retries = 0
+            self.payload_bytes = 0
+            self.response_bytes = 0
+            self.rows = 0
+            self._timings = {name: deque(maxlen=self.Window) for name in TIMINGS}
+
+    def add_hook(self, hook):
+        self.Hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.Hooks.remove(hook)
+
+    def record(self, metrics):
+        """ Add a RequestMetrics record and pass it to the hooks. """
+        with self._lock:
+            self.requests += 1
+            self.fetched += bool(metrics.fetched)
+            self.errors += bool(metrics.error)
+            self.retries += metrics.retries or 0
+            self.payload_bytes += metrics.payload_bytes or 0
+            self.response_bytes += metrics.response_bytes or 0
+            self.rows += metrics.rows or 0
+            for name in TIMINGS:
+                value = getattr(metrics, name)
+                if value is not None:
+                    self._timings[name].append(value)
+        for hook in list(self.Hooks):
+            try:
+                hook(metrics)
+            except Exception as e:     # pylint: disable=W0703
+                # A broken metrics exporter must not break the requests.
+                warnings.warn("RequestStats hook %r failed: %s: %s" % (hook, type(e).__name__, e))
+
+    def percentile(self, name, q):
+        """ Return the q'th percentile (0-100) of timing <name> (e.g. "ttfb"), or None if no data. """
+        with self._lock:
+            values = sorted(self._timings[name])
+        return percentile(values, q)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """ Return dict of timing name: {count, mean, max, p50, p90, p99}. """
+        with self._lock:
+            timings = {name: sorted(values) for name, values in self._timings.items()}
+        summary = {}
+        for name, values in timings.items():
+            stats = {"count": len(values),
+                     "mean": sum(values) / len(values) if values else None,
+                     "max": values[-1] if values else None}
+            for q in percentiles:
+                stats["p%s" % q] = percentile(values, q)
+            summary[name] = stats
+        return summary
+
+    def asdict(self):
+        return dict(requests=self.requests, fetched=self.fetched, errors=self.errors, retries=self.retries,
+                    payload_bytes=self.payload_bytes, response_bytes=self.response_bytes, rows=self.rows,
+                    timings=self.summary())
+
+    def __repr__(self):
+        return "RequestStats(requests=%s, fetched=%s, errors=%s)" % (self.requests, self.fetched, self.errors)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Streaming, tree-free parser for sitefind.pl html pages.
+
+Instead of building a full BeautifulSoup document, streamparser.SitefindParser is fed the html
+(all at once or in chunks, e.g. directly from the http response) and pulls out the
+three things we need in a single pass:
+    * the page <title> (used to detect "Error" and "No Cut Sites" pages),
+    * the text of the cells of the first <table> (header row included),
+    * the text of the <b> element with the "Noncutters:" list.
+
+This is the default parser used by Digest/MapSites and RemoteRestMap. It can also be used directly:
+
+    page = parse_sitefind(html)
+    page.title, page.rows, page.noncutters
+
+parse_html(html, parser="bs4") produces the same SitefindPage using BeautifulSoup.
+Either way, the html is parsed exactly once: RemoteRestMap parses the response, checks it
+with check_page, and hands the SitefindPage to Digest/MapSites.
+
+SitefindParser lives in streamparser.py and is imported on first use, as is BeautifulSoup,
+so importing this module does not load any html parser.
+"""
+
+from collections import namedtuple
+
+
+SitefindPage = namedtuple("SitefindPage", ["title", "rows", "noncutters"])
+
+
+def parse_noncutters(text):
+    """ Return list of enzyme names from the text of the "Noncutters: A, B, C" element. """
+    if text is None:
+        return None
+    return [enz.strip() for enz in text.replace('Noncutters:', '').split(',') if enz.strip()]
+
+
+def parse_sitefind(html):
+    """
+    Parse sitefind html and return a SitefindPage(title, rows, noncutters).
+    <html> can be a string or an iterable of string chunks (e.g. response.iter_content(decode_unicode=True)).
+    """
+    from .streamparser import SitefindParser
+    parser = SitefindParser()
+    if isinstance(html, str):
+        parser.feed(html)
+    else:
+        for chunk in html:
+            parser.feed(chunk)
+    parser.close()
+    return parser.result()
+
+
+def soup_to_page(root):
+    """ Return SitefindPage from a BeautifulSoup document. """
+    title = root.find('title')
+    table = root.find('table')
+    rows = [[td.text.strip() for td in row.find_all('td')] for row in table.find_all('tr')] if table else []
+    noncutters = [elem for elem in root.find_all('b') if "Noncutters:" in elem.text]
+    return SitefindPage(title.text if title else None, rows,
+                        parse_noncutters(noncutters[0].text) if noncutters else None)
+
+
+def parse_html(html, parser="stream"):
+    """
+    Parse sitefind html with the given parser backend ("stream" or "bs4") and return a SitefindPage.
+    """
+    if parser == "stream":
+        return parse_sitefind(html)
+    elif parser == "bs4":
+        from bs4 import BeautifulSoup
+        return soup_to_page(BeautifulSoup(html, "html.parser"))
+    raise ValueError("Unknown parser: %r" % (parser,))
+
+
+
+def check_page(page, url=None):
+    """
+    Raise ValueError if the page is a sitefind error page or a "No Cut Sites" page.
+    """
+    if page.title is None:
+        return
+    if page.title.strip() == "Error":
+        raise ValueError("Error response from %s: %s" % (url or "sitefind", page.title))
+    if "No Cut Sites" in page.title:
+        raise ValueError("No Cut Sites")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Plan diagnostic digests from a single restriction map, without asking the server.
+
+    planner = DigestPlanner(restriction_map, length=len(dna), circular=True)
+    for plan in planner.plan(max_enzymes=2, min_size=300, max_size=8000, min_separation=0.15):
+        print(plan.enzymes, plan.fragments, plan.score)
+
+Every combination of up to max_enzymes enzymes is considered: their cut lists are merged
+and the fragment lengths computed directly from the cut positions (with numpy, if available).
+Combinations are ranked by how well the bands can be told apart on a gel: the score is the
+smallest relative difference between two adjacent band sizes (higher is better).
+
+Constraints:
+    min_size, max_size - all fragments must be within this size range.
+    min_bands, max_bands - number of fragments.
+    min_separation - min relative size difference between adjacent bands, e.g. 0.1 = 10%.
+    unique_fragment - (low, high); exactly one fragment must be in this size range.
+
+To keep this tractable for maps with hundreds of cutters:
+    * enzymes with more than max_cuts cuts are not considered,
+    * enzymes with identical cut positions (e.g. isoschizomers) are only tried once
+      (the others are listed in Plan.alternatives),
+    * combinations are built incrementally, and since adding an enzyme can only add cuts,
+      no superset of a combination with too many bands or a fragment shorter than min_size is tried.
+"""
+
+import heapq
+from collections import namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+Plan = namedtuple("Plan", ["score", "enzymes", "fragments", "alternatives"])
+
+
+class DigestPlanner(object):
+    """
+    Enumerates and ranks enzyme combinations for a MapSites (or columnar.ColumnarMap) result.
+    Args:
+        restriction_map - the MapSites/ColumnarMap result.
+        length - length of the mapped sequence.
+        circular - whether the sequence is circular.
+        max_cuts - enzymes cutting more than this number of times are not considered.
+    """
+
+    def __init__(self, restriction_map, length, circular=False, max_cuts=10):
+        self.Length = length
+        self.Circular = circular
+        if hasattr(restriction_map, 'enzyme_cuts'):
+            cutlists = [(name, restriction_map.enzyme_cuts(i)) for i, name in enumerate(restriction_map.names)]
+        else:
+            cutlists = [(row['NAME'], [int(pos) for pos in row['CUTPOS'] if pos])
+                        for row in restriction_map.dictrows]
+        # Group enzymes with identical cuts; only the first one is used for planning:
+        self.enzymes = []
+        self.cuts = {}
+        self.alternatives = {}
+        by_cuts = {}
+        for name, positions in cutlists:
+            positions = frozenset(positions)
+            if not positions or (max_cuts is not None and len(positions) > max_cuts):
+                continue
+            if positions in by_cuts:
+                self.alternatives[by_cuts[positions]].append(name)
+                continue
+            by_cuts[positions] = name
+            self.enzymes.append(name)
+            self.cuts[name] = positions
+            self.alternatives[name] = []
+
+    def fragments(self, positions):
+        """ Return the fragment lengths (sorted, largest first) for a collection of cut positions. """
+        n = self.Length
+        positions = sorted(positions)
+        if not positions:
+            return [n]
+        if numpy is not None:
+            pos = numpy.asarray(positions)
+            if self.Circular:
+                lengths = numpy.diff(pos, append=pos[0] + n)
+            else:
+                lengths = numpy.diff(pos, prepend=0, append=n)
+            lengths = sorted(lengths.tolist(), reverse=True)
+        else:
+            if self.Circular:
+                ends = positions[1:] + [positions[0] + n]
+                lengths = sorted(map(int.__sub__, ends, positions), reverse=True)
+            else:
+                lengths = sorted(map(int.__sub__, positions + [n], [0] + positions), reverse=True)
+        if not self.Circular:
+            # Cuts at the very ends of a linear sequence don't make a fragment:
+            lengths = [length for length in lengths if length > 0]
+        return lengths
+
+    @staticmethod
+    def separation(fragments):
+        """ Smallest relative size difference between adjacent bands (fragments sorted largest first). """
+        if len(fragments) < 2:
+            return 1.0
+        return min((a - b) / a for a, b in zip(fragments, fragments[1:]))
+
+    def plan(self, max_enzymes=2, min_enzymes=1, min_size=None, max_size=None, min_bands=2, max_bands=None,
+             min_separation=0.0, unique_fragment=None, top=20):
+        """
+        Return list of the <top> best Plans (best first) matching the constraints (see module docstring).
+        """
+        best = []   # heap of (score, -len(enzymes), enzymes, fragments)
+        enzymes = self.enzymes
+
+        def too_fragmented(fragments):
+            # Adding enzymes only adds cuts, so these can never be fixed by a superset:
+            return ((max_bands is not None and len(fragments) > max_bands) or
+                    (min_size is not None and fragments[-1] < min_size))
+
+        def acceptable(fragments):
+            if min_bands is not None and len(fragments) < min_bands:
+                return False
+            if max_size is not None and fragments[0] > max_size:
+                return False
+            if unique_fragment is not None:
+                low, high = unique_fragment
+                if sum(1 for length in fragments if low <= length <= high) != 1:
+                    return False
+            return self.separation(fragments) >= min_separation
+
+        def search(start, combo, positions):
+            for j in range(start, len(enzymes)):
+                name = enzymes[j]
+                merged = positions | self.cuts[name]
+                if merged == positions:
+                    continue    # The enzyme adds no cuts.
+                fragments = self.fragments(merged)
+                if too_fragmented(fragments):
+                    continue
+                new_combo = combo + (name,)
+                if len(new_combo) >= min_enzymes and acceptable(fragments):
+                    item = (self.separation(fragments), -len(new_combo), new_combo, fragments)
+                    if len(best) < top:
+                        heapq.heappush(best, item)
+                    elif item[:2] > best[0][:2]:
+                        heapq.heapreplace(best, item)
+                if len(new_combo) < max_enzymes:
+                    search(j + 1, new_combo, merged)
+
+        search(0, (), frozenset())
+        plans = sorted(best, key=lambda item: (-item[0], -item[1], item[2]))
+        return [Plan(score, list(combo), fragments, {name: self.alternatives[name] for name in combo})
+                for score, _, combo, fragments in plans]
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Sequence normalization and streaming sequence file readers.
+
+normalize_sequence upper-cases, validates and strips a sequence with str.translate and a single
+regex scan, i.e. at C speed, and reports the positions of any invalid characters:
+
+    seq, invalid = normalize_sequence("acgt nnn\\n1 gatc")
+    # seq = "ACGTGATC", invalid = [5, 6, 7]
+
+read_records reads FASTA or GenBank files (optionally gzipped) one record at a time,
+so multi-record files can be fed to RemoteRestMap without loading the whole file:
+
+    for name, request in iter_requests(url, "constructs.fasta"):
+        restriction_map = request.get_map(settings)
+
+    async for res in client.map_many(read_records("constructs.gb"), settings):   # aio.AsyncRemoteRestMap
+        ...
+"""
+
+import gzip
+import io
+import itertools
+import os
+import re
+import string
+
+
+# Whitespace and numbers (e.g. GenBank position numbers) are removed silently when stripping.
+FORMATTING = string.whitespace + string.digits
+
+_tables = {}
+
+
+def _normalize_tables(valid_bases, strip):
+    """ Return (cached) (invalid-character regex, translate table) for the given valid bases. """
+    key = (valid_bases, strip)
+    if key not in _tables:
+        if strip:
+            invalid = re.compile("[^%s%s]" % (re.escape(valid_bases.upper()), re.escape(FORMATTING)))
+            # Delete every character that is not a valid base. Only ascii can be listed in a table,
+            # any other (non-ascii) characters are reported as invalid and handled by the caller.
+            delete = "".join(chr(i) for i in range(128) if chr(i) not in valid_bases.upper())
+        else:
+            invalid = re.compile("[^%s]" % re.escape(valid_bases.upper()))
+            delete = ""
+        _tables[key] = (invalid, str.maketrans("", "", delete))
+    return _tables[key]
+
+
+def normalize_sequence(sequence, valid_bases="ATGC", strip=True):
+    """
+    Return (normalized sequence, list of positions of invalid characters).
+    The sequence is upper-cased. If strip is True, whitespace and numbers are removed silently and all
+    other characters not in valid_bases are removed and reported as invalid. If strip is False, nothing
+    is removed, and every character not in valid_bases (whitespace and numbers too) is reported as invalid.
+    Positions are 0-based indices into the input sequence.
+    sequence can be a str or a bytes-like (ascii) object.
+    """
+    if not isinstance(sequence, str):
+        sequence = bytes(sequence).decode('ascii', 'replace')
+    sequence = sequence.upper()
+    invalid_re, table = _normalize_tables(valid_bases, strip)
+    invalid = [match.start() for match in invalid_re.finditer(sequence)]
+    normalized = sequence.translate(table)
+    if strip and invalid and not normalized.isascii():
+        normalized = invalid_re.sub("", normalized)
+    return normalized, invalid
+
+
+def _open(source):
+    """
+    Return (iterable of lines, close) for a path (gzip if it ends with .gz), or for an already open
+    file or any other iterable of lines, which are returned as they are (and not closed).
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        return source, False
+    if str(source).endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(source)), True
+    return open(source), True
+
+
+def read_fasta(source):
+    """ Yield (name, sequence) for each record in a FASTA file (path, file handle or iterable of lines). """
+    fd, close = _open(source)
+    try:
+        name, chunks = None, []
+        for line in fd:
+            if line.startswith(">"):
+                if name is not None:
+                    yield name, "".join(chunks)
+                name, chunks = line[1:].strip(), []
+            elif line.strip() and not line.startswith(";"):
+                chunks.append(line.strip())
+        if name is not None:
+            yield name, "".join(chunks)
+    finally:
+        if close:
+            fd.close()
+
+
+_genbank_strip = str.maketrans("", "", FORMATTING)
+
+
+def read_genbank(source):
+    """ Yield (name, sequence) for each record in a GenBank file (path, file handle or iterable of lines). """
+    fd, close = _open(source)
+    try:
+        name, chunks, in_sequence = None, [], False
+        for line in fd:
+            if line.startswith("LOCUS"):
+                fields = line.split()
+                name, chunks, in_sequence = (fields[1] if len(fields) > 1 else ""), [], False
+            elif line.startswith("ORIGIN"):
+                in_sequence = True
+            elif line.startswith("//"):
+                if name is not None:
+                    yield name, "".join(chunks)
+                name, chunks, in_sequence = None, [], False
+            elif in_sequence:
+                chunks.append(line.translate(_genbank_strip))
+        if name is not None and chunks:
+            yield name, "".join(chunks)
+    finally:
+        if close:
+            fd.close()
+
+
+def read_records(source, format=None):  # pylint: disable=W0622
+    """
+    Yield (name, sequence) for each record in a FASTA or GenBank file (path, file handle or iterable of lines).
+    The format is detected from the first line if not given ("fasta" or "genbank").
+    """
+    fd, close = _open(source)
+    try:
+        lines = iter(fd)
+        if format is None:
+            first = next(lines, "")
+            while first and not first.strip():
+                first = next(lines, "")
+            format = "genbank" if first.startswith("LOCUS") else "fasta"
+            # Put the first line back in front of the rest of the file:
+            lines = itertools.chain([first], lines)
+        reader = read_genbank if format == "genbank" else read_fasta
+        for record in reader(lines):
+            yield record
+    finally:
+        if close:
+            fd.close()
+
+
+def iter_requests(url, source, settings=None, format=None, **kwargs):  # pylint: disable=W0622
+    """
+    Yield (name, RemoteRestMap) for each record in a FASTA/GenBank file.
+    Extra keyword arguments (e.g. session, cache) are passed to RemoteRestMap.
+    """
+    from . import RemoteRestMap
+    for name, sequence in read_records(source, format):
+        yield name, RemoteRestMap(url, sequence, settings, **kwargs)
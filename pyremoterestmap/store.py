@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Queryable SQLite store of MapSites/Digest results for many sequences.
+
+    store = ResultStore("constructs.sqlite")
+    store.add_many((name, request.get_map(settings), {"length": len(dna)})
+                   for name, request in iter_requests(url, "constructs.fasta", settings))
+    store.add("pUC19", digest, settings={"enzymelist": ["EcoRI", "PstI"]})
+
+    # All constructs where BamHI and XhoI each cut once:
+    for name, restriction_map in store.find_cutters({"BamHI": 1, "XhoI": 1}):
+        ...
+    # Constructs with a 900-1100 bp fragment after EcoRI + PstI (stored digests, and maps of
+    # constructs stored with their sequence):
+    for name, digest in store.find_fragments(900, 1100, ["EcoRI", "PstI"]):
+        ...
+    store.get("pUC19", kind="map")          # MapSites
+
+Results are ingested into indexed tables:
+    sequences(id, name, length, circular, sequence)
+    results(id, sequence_id, kind, settings, enzymes, headers, rows, noncutters)   - one per result
+    map_rows(result_id, enzyme, cutnumber, ...)  - one per enzyme in a map; indexed by enzyme and cut number
+    cuts(result_id, enzyme, position)            - one per cut in a map; indexed by enzyme
+    fragments(result_id, length, ...)            - one per fragment in a digest; indexed by length
+The full table of each result is also stored (as json), so results are returned exactly as
+they were added, without any html parsing.
+
+A sequence has at most one result per kind ("map" or "digest") and settings; adding it again replaces it.
+add_many inserts in batched transactions, which is much faster than one transaction per result.
+"""
+
+import json
+import sqlite3
+
+from .cache import canonical_settings
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sequences (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    length INTEGER,
+    circular INTEGER,
+    sequence TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    sequence_id INTEGER NOT NULL REFERENCES sequences(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    enzymes TEXT,
+    headers TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    noncutters TEXT,
+    UNIQUE (sequence_id, kind, settings)
+);
+CREATE TABLE IF NOT EXISTS map_rows (
+    result_id INTEGER NOT NULL REFERENCES results(id) ON DELETE CASCADE,
+    enzyme TEXT NOT NULL COLLATE NOCASE,
+    site TEXT,
+    site_length INTEGER,
+    cutnumber INTEGER,
+    overhang TEXT
+);
+CREATE TABLE IF NOT EXISTS cuts (
+    result_id INTEGER NOT NULL REFERENCES results(id) ON DELETE CASCADE,
+    enzyme TEXT NOT NULL COLLATE NOCASE,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fragments (
+    result_id INTEGER NOT NULL REFERENCES results(id) ON DELETE CASCADE,
+    length INTEGER NOT NULL,
+    start_enzyme TEXT,
+    five_prime INTEGER,
+    end_enzyme TEXT,
+    three_prime INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_kind ON results (kind, enzymes);
+CREATE INDEX IF NOT EXISTS map_rows_enzyme ON map_rows (enzyme, cutnumber);
+CREATE INDEX IF NOT EXISTS map_rows_result ON map_rows (result_id);
+CREATE INDEX IF NOT EXISTS cuts_enzyme ON cuts (enzyme, result_id);
+CREATE INDEX IF NOT EXISTS cuts_result ON cuts (result_id);
+CREATE INDEX IF NOT EXISTS fragments_length ON fragments (length);
+CREATE INDEX IF NOT EXISTS fragments_result ON fragments (result_id);
+"""
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def enzyme_set(names):
+    """ Return the normalized (sorted, lower case, comma separated) form of a set of enzyme names. """
+    return ",".join(sorted({name.strip().lower() for name in names if name and name.strip()}))
+
+
+class ResultStore(object):
+    """
+    SQLite store of results, see module docstring.
+    Args:
+        path - database file (created if it does not exist), or ":memory:".
+    """
+
+    def __init__(self, path=":memory:"):
+        self.Path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self.db.execute("PRAGMA journal_mode = WAL")
+            self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _sequence_id(self, name, length=None, circular=None, sequence=None):
+        if sequence is not None and length is None:
+            length = len(sequence)
+        self.db.execute("INSERT INTO sequences (name) VALUES (?) ON CONFLICT (name) DO NOTHING", (name,))
+        self.db.execute("UPDATE sequences SET length = coalesce(?, length), circular = coalesce(?, circular), "
+                        "sequence = coalesce(?, sequence) WHERE name = ?",
+                        (length, None if circular is None else int(circular), sequence, name))
+        return self.db.execute("SELECT id FROM sequences WHERE name = ?", (name,)).fetchone()[0]
+
+    def _insert(self, name, result, settings=None, length=None, circular=None, sequence=None):
+        """ Insert one result (without committing). Returns the result id. """
+        from .map import MapSites
+        settings = settings or {}
+        if circular is None and settings.get("DNAtype"):
+            circular = settings["DNAtype"] == "circular"
+        kind = "map" if isinstance(result, MapSites) else "digest"
+        sequence_id = self._sequence_id(name, length, circular, sequence)
+        canon = canonical_settings(settings)
+        self.db.execute("DELETE FROM results WHERE sequence_id = ? AND kind = ? AND settings = ?",
+                        (sequence_id, kind, canon))
+        rows = list(result.iter_rows())
+        headers = list(result.headers)
+        if kind == "map":
+            enzymes = enzyme_set(row['NAME'] for row in result.dictrows)
+        elif settings.get("enzymelist"):
+            enzymes = enzyme_set(settings["enzymelist"])
+        else:
+            # The enzymes that made the cuts, plus those that didn't cut:
+            names = [name for row in result.dictrows for key in ("START_ENZ", "END_ENZ")
+                     for name in (row.get(key) or "").split("/")]
+            enzymes = enzyme_set(names + list(result.Noncutters or []))
+        cursor = self.db.execute(
+            "INSERT INTO results (sequence_id, kind, settings, enzymes, headers, rows, noncutters) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (sequence_id, kind, canon, enzymes, json.dumps(headers), json.dumps(rows),
+             None if result.Noncutters is None else json.dumps(result.Noncutters)))
+        result_id = cursor.lastrowid
+        if kind == "map":
+            self.db.executemany(
+                "INSERT INTO map_rows (result_id, enzyme, site, site_length, cutnumber, overhang) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(result_id, row['NAME'], row.get('SITE'), _int(row.get('LENGTH')),
+                  _int(row.get('CUTNUMBER')), row.get('OVERHANG')) for row in result.dictrows])
+            self.db.executemany(
+                "INSERT INTO cuts (result_id, enzyme, position) VALUES (?, ?, ?)",
+                [(result_id, row['NAME'], int(pos)) for row in result.dictrows for pos in row['CUTPOS'] if pos])
+        else:
+            self.db.executemany(
+                "INSERT INTO fragments (result_id, length, start_enzyme, five_prime, end_enzyme, three_prime) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(result_id, _int(row.get('LENGTH')), row.get('START_ENZ'), _int(row.get('FIVE_PRIME')),
+                  row.get('END_ENZ'), _int(row.get('THREE_PRIME'))) for row in result.dictrows])
+        return result_id
+
+    def add(self, name, result, settings=None, length=None, circular=None, sequence=None):
+        """
+        Add (or replace) a MapSites/Digest result for sequence <name>, in its own transaction. Returns the result id.
+        Args:
+            settings - the settings used for the result. Part of the result's identity; for digests,
+                settings["enzymelist"] is the digest's enzyme set.
+            length, circular - the sequence length and topology (circular defaults from settings["DNAtype"]).
+            sequence - optionally, the sequence itself (also gives length). Needed for find_fragments on maps.
+        """
+        with self.db:
+            return self._insert(name, result, settings, length, circular, sequence)
+
+    def add_many(self, items, batch_size=500):
+        """
+        Add many results, committing once per batch of <batch_size> results.
+        items is an iterable of (name, result) or (name, result, kwargs) tuples, where kwargs is a dict
+        with any of the add keyword arguments (settings, length, circular, sequence).
+        Returns the number of results added.
+        """
+        count = 0
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                count += self._add_batch(batch)
+                batch = []
+        if batch:
+            count += self._add_batch(batch)
+        return count
+
+    def _add_batch(self, batch):
+        with self.db:
+            for item in batch:
+                name, result = item[:2]
+                kwargs = item[2] if len(item) > 2 else {}
+                self._insert(name, result, **kwargs)
+        return len(batch)
+
+    def _load(self, kind, headers, rows, noncutters):
+        from .parser import SitefindPage
+        from .digest import Digest
+        from .map import MapSites
+        cls = MapSites if kind == "map" else Digest
+        page = SitefindPage(None, json.loads(rows), None if noncutters is None else json.loads(noncutters))
+        return cls(page, headers=json.loads(headers))
+
+    def _results(self, where, params=(), order="s.name, r.id"):
+        """ Return list of (name, result) for the results matching the where clause. """
+        cursor = self.db.execute(
+            "SELECT s.name, r.kind, r.headers, r.rows, r.noncutters FROM results r "
+            "JOIN sequences s ON s.id = r.sequence_id WHERE %s ORDER BY %s" % (where, order), params)
+        return [(name, self._load(kind, headers, rows, noncutters)) for name, kind, headers, rows, noncutters in cursor]
+
+    def get(self, name, kind="map", settings=None):
+        """
+        Return the stored result for sequence <name> (MapSites for kind "map", Digest for "digest").
+        If settings is None, the most recently added result of that kind is returned.
+        Raises KeyError if there is no such result.
+        """
+        if settings is None:
+            found = self._results("s.name = ? AND r.kind = ?", (name, kind), order="r.id DESC LIMIT 1")
+        else:
+            found = self._results("s.name = ? AND r.kind = ? AND r.settings = ?",
+                                  (name, kind, canonical_settings(settings)))
+        if not found:
+            raise KeyError((name, kind, settings))
+        return found[0][1]
+
+    def names(self):
+        """ Return sorted list of sequence names in the store. """
+        return [row[0] for row in self.db.execute("SELECT name FROM sequences ORDER BY name")]
+
+    def __len__(self):
+        return self.db.execute("SELECT count(*) FROM results").fetchone()[0]
+
+    def find_cutters(self, cutters, load=True):
+        """
+        Return the maps in which each enzyme in <cutters> cuts the given number of times,
+        as a list of (name, MapSites), or a list of names if load is False.
+        cutters is a dict of enzyme name: number of cuts, or (min, max) range of cuts.
+        A count of 0 matches maps where the enzyme is listed among the noncutters.
+        """
+        clauses, params = ["r.kind = 'map'"], []
+        for enzyme, count in cutters.items():
+            low, high = count if isinstance(count, (tuple, list)) else (count, count)
+            if low <= 0:
+                # Either doesn't cut (noncutter) or cuts <= high times:
+                clauses.append("(r.id IN (SELECT result_id FROM map_rows WHERE enzyme = ? AND cutnumber <= ?) OR "
+                               "(r.id NOT IN (SELECT result_id FROM map_rows WHERE enzyme = ?) AND "
+                               "EXISTS (SELECT 1 FROM json_each(r.noncutters) WHERE value = ? COLLATE NOCASE)))")
+                params.extend([enzyme, high, enzyme, enzyme])
+            else:
+                clauses.append("r.id IN (SELECT result_id FROM map_rows WHERE enzyme = ? AND cutnumber BETWEEN ? AND ?)")
+                params.extend([enzyme, low, high])
+        where = " AND ".join(clauses)
+        if not load:
+            return [row[0] for row in self.db.execute(
+                "SELECT DISTINCT s.name FROM results r JOIN sequences s ON s.id = r.sequence_id "
+                "WHERE %s ORDER BY s.name" % where, params)]
+        return self._results(where, params)
+
+    def find_fragments(self, min_size, max_size, enzymes, load=True, from_maps=True):
+        """
+        Return the sequences that give a fragment of min_size to max_size bp when digested with <enzymes>,
+        as a list of (name, Digest), or a list of names if load is False.
+        Stored digests with exactly this enzyme set are searched via the fragment length index.
+        If from_maps is True, the digest is also computed from the cuts of stored maps, for sequences
+        without such a digest that were stored with their sequence.
+        """
+        enzymes_key = enzyme_set(enzymes)
+        found = {}
+        query = ("SELECT DISTINCT s.name, r.id FROM fragments f JOIN results r ON r.id = f.result_id "
+                 "JOIN sequences s ON s.id = r.sequence_id "
+                 "WHERE f.length BETWEEN ? AND ? AND r.kind = 'digest' AND r.enzymes = ? ORDER BY s.name")
+        for name, result_id in self.db.execute(query, (min_size, max_size, enzymes_key)).fetchall():
+            if name not in found:
+                found[name] = result_id
+        results = {}
+        if load and found:
+            results.update(self._results("r.id IN (%s)" % ",".join("?" * len(found)), list(found.values())))
+        if from_maps:
+            results.update(self._digests_from_maps(min_size, max_size, enzymes, exclude=found, load=load))
+        if not load:
+            return sorted(set(found) | set(results))
+        return sorted(results.items())
+
+    def _digests_from_maps(self, min_size, max_size, enzymes, exclude=(), load=True):
+        """
+        Return dict of name: Digest (or None if not load) computed from stored map cuts and sequences.
+        A map is only used if every enzyme is either one of its rows or listed among its noncutters,
+        so that the cuts of all the enzymes are known (e.g. not filtered away by maxcuts or enzymelist).
+        """
+        from .local import digest_sequence
+        wanted = sorted({name.lower() for name in enzymes})
+        placeholders = ",".join("?" * len(wanted))
+        # The enzyme columns are COLLATE NOCASE, so these comparisons are case insensitive and use the indexes:
+        known = " AND ".join(["(r.id IN (SELECT result_id FROM map_rows WHERE enzyme = ?) OR "
+                              "EXISTS (SELECT 1 FROM json_each(r.noncutters) WHERE value = ? COLLATE NOCASE))"]
+                             * len(wanted))
+        query = ("SELECT s.name, s.sequence, s.circular, r.id FROM results r JOIN sequences s ON s.id = r.sequence_id "
+                 "WHERE r.kind = 'map' AND s.sequence IS NOT NULL AND r.id IN "
+                 "(SELECT result_id FROM cuts WHERE enzyme IN (%s)) AND %s ORDER BY s.name, r.id DESC"
+                 % (placeholders, known))
+        params = wanted + [name for name in wanted for _ in range(2)]
+        found = {}
+        for name, sequence, circular, result_id in self.db.execute(query, params).fetchall():
+            if name in exclude or name in found:
+                continue
+            cuts = {}
+            for enzyme, position in self.db.execute(
+                    "SELECT enzyme, position FROM cuts WHERE result_id = ? AND enzyme IN (%s)" % placeholders,
+                    [result_id] + wanted):
+                cuts.setdefault(enzyme, []).append(position)
+            cutters = {enzyme.lower() for enzyme in cuts}
+            noncutters = [enzyme for enzyme in enzymes if enzyme.lower() not in cutters]
+            digest = digest_sequence(sequence, cuts, bool(circular), noncutters, lazy=True)
+            if any(min_size <= int(row['LENGTH']) <= max_size for row in digest.dictrows):
+                found[name] = digest if load else None
+        return found
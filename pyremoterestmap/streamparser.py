@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+The event-driven sitefind html parser (used by parser.parse_sitefind, the "stream" parser backend).
+
+This is a separate module so that html.parser is only imported when html is actually parsed,
+see parser.py.
+"""
+
+from html.parser import HTMLParser
+
+from .parser import SitefindPage, parse_noncutters
+
+
+class SitefindParser(HTMLParser):
+    """
+    Event-driven sitefind html parser. Only the current cell/element text is buffered.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.rows = []
+        self.noncutters_text = None
+        self._title_buf = None
+        self._table_depth = 0   # Depth of nested tables inside the first table.
+        self._table_done = False
+        self._row = None
+        self._cell = None
+        self._bold_depth = 0
+        self._bold_buf = None
+
+    # Cells and rows are closed either explicitly or by the next cell/row (html allows omitting </td> and </tr>).
+    def _close_cell(self):
+        if self._cell is not None:
+            self._row.append("".join(self._cell).strip())
+            self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self._title_buf = []
+        elif tag == 'table' and not self._table_done:
+            self._table_depth += 1
+        elif tag == 'tr' and self._table_depth:
+            self._close_row()
+            self._row = []
+        elif tag == 'td' and self._table_depth:
+            if self._row is None:
+                self._row = []
+            self._close_cell()
+            self._cell = []
+        elif tag == 'b' and self.noncutters_text is None:
+            self._bold_depth += 1
+            if self._bold_depth == 1:
+                self._bold_buf = []
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._title_buf is not None:
+            self.title = "".join(self._title_buf)
+            self._title_buf = None
+        elif tag == 'table' and self._table_depth:
+            self._table_depth -= 1
+            if not self._table_depth:
+                self._close_row()
+                self._table_done = True
+        elif tag == 'tr' and self._table_depth:
+            self._close_row()
+        elif tag == 'td' and self._table_depth:
+            self._close_cell()
+        elif tag == 'b' and self._bold_depth:
+            self._bold_depth -= 1
+            if not self._bold_depth:
+                text = "".join(self._bold_buf)
+                self._bold_buf = None
+                if "Noncutters:" in text:
+                    self.noncutters_text = text
+
+    def handle_data(self, data):
+        if self._title_buf is not None:
+            self._title_buf.append(data)
+        if self._cell is not None:
+            self._cell.append(data)
+        if self._bold_buf is not None:
+            self._bold_buf.append(data)
+
+    def close(self):
+        super().close()
+        if self._table_depth:
+            self._close_row()
+
+    def result(self):
+        return SitefindPage(self.title, self.rows, parse_noncutters(self.noncutters_text))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2015 Rasmus Sorensen, rasmusscholer@gmail.com <scholer.github.io>
+
+##    This program is free software: you can redistribute it and/or modify
+##    it under the terms of the GNU General Public License as published by
+##    the Free Software Foundation, either version 3 of the License, or
+##    (at your option) any later version.
+##
+##    This program is distributed in the hope that it will be useful,
+##    but WITHOUT ANY WARRANTY; without even the implied warranty of
+##    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##    GNU General Public License for more details.
+##
+##    You should have received a copy of the GNU General Public License
+
+# pylint: disable=C0103,W0142
+
+
+"""
+Answer any get_map settings from one broad "superset" map, without asking the server again.
+
+Every combination of maxcuts, minlength, overhang, enzymetype, isoschizomers, enzymelist
+and first/second/third sort order is a subset and/or reordering of the map made with
+SUPERSET_SETTINGS (all enzymes, all cuts, all overhangs, shortest sites). So:
+
+    request = RemoteRestMap(url, dna, superset=True)
+    request.get_map({"maxcuts": "1", "enzymetype": "NEB"})        # Fetches the superset map (once per DNAtype)
+    request.get_map({"minlength": 6, "first": "name"})            # Answered locally
+
+or directly:
+
+    superset = SupersetMap(request.get_map(superset_settings("circular")))
+    restriction_map = superset.select(settings)
+
+The superset is held as columns (name, site length, cut number, overhang, supplier and prototype flags),
+so select builds a row mask column by column and then does one stable multi-key sort (map.sort_rows).
+The enzyme table (local.default_enzymes, or the enzymes argument) supplies the metadata the map does
+not have: suppliers (for enzymetype="NEB") and prototypes (for isoschizomers="no"), as well as
+site length and overhang of the noncutters. Noncutters are filtered by the same criteria.
+Settings that are not given take the documented get_map defaults (default_settings("map"):
+minlength 5, isoschizomers "no", ...).
+
+The server can have enzymes that are not in the enzyme table. Settings that filter on metadata
+of such an enzyme (enzymetype, isoschizomers, and minlength/overhang for a noncutter) cannot be
+answered from the superset; answers(settings) is False for those, and RemoteRestMap.get_map then
+asks the server instead. So the result is the same with and without superset=True.
+(select still answers them, excluding the unknown enzymes when filtering by enzymetype and
+counting them as prototypes.)
+"""
+
+from itertools import compress
+
+from . import default_settings
+from .parser import SitefindPage
+from .map import MapSites, sort_rows
+
+
+SUPERSET_SETTINGS = {
+    "DNAtype": "linear",
+    "first": "frequency", "second": "overhang", "third": "name",
+    "enzymetype": "all",
+    "maxcuts": "all",
+    "minlength": "4",
+    "isoschizomers": "all",     # sitefind: "all" = include isoschizomers.
+    "overhang": ["five_prime", "three_prime", "blunt"],
+    "enzymelist": None,
+}
+
+
+def superset_settings(dnatype="linear"):
+    """ Return the settings for the superset map of a linear or circular sequence. """
+    return dict(SUPERSET_SETTINGS, DNAtype=dnatype)
+
+
+class SupersetMap(object):
+    """
+    Columnar view of a superset MapSites, which answers get_map settings locally (see module docstring).
+    Args:
+        restriction_map - MapSites made with superset_settings.
+        enzymes - dict of name: local.Enzyme with supplier and prototype metadata. Default is the bundled table.
+    """
+
+    def __init__(self, restriction_map, enzymes=None):
+        if enzymes is None:
+            from .local import default_enzymes
+            enzymes = default_enzymes()
+        self.Map = restriction_map
+        self.Enzymes = enzymes
+        self.rows = [row[:6] for row in restriction_map.rows]
+        self.names = [row[0] for row in self.rows]
+        self.lengths = [int(row[2]) for row in self.rows]
+        self.cutnumbers = [int(row[3]) for row in self.rows]
+        self.overhangs = [row[4] for row in self.rows]
+        self.neb = [self._neb(name) for name in self.names]
+        self.prototypes = [self._prototype(name) for name in self.names]
+        self.Noncutters = list(restriction_map.Noncutters or [])
+        # Enzymes without metadata in the enzyme table:
+        self.unknown_cutters = frozenset(name for name in self.names if name not in enzymes)
+        self.unknown_noncutters = frozenset(name for name in self.Noncutters if name not in enzymes)
+
+    def _neb(self, name):
+        enz = self.Enzymes.get(name)
+        return enz is not None and "N" in enz.suppliers
+
+    def _prototype(self, name):
+        enz = self.Enzymes.get(name)
+        return enz is None or enz.prototype == name
+
+    def _noncutter_selected(self, name, minlength, overhang, neb_only, prototypes_only):
+        enz = self.Enzymes.get(name)
+        if enz is None:
+            # Without metadata, only keep it if there is nothing to filter on:
+            return not (minlength or neb_only or len(overhang) < 3)
+        return (enz.length >= minlength and enz.overhang in overhang
+                and (not neb_only or "N" in enz.suppliers)
+                and (not prototypes_only or enz.prototype == name))
+
+    @staticmethod
+    def _settings(settings):
+        """ Return settings with the get_map defaults for the settings that are not given (or None). """
+        return dict(default_settings("map"),
+                    **{key: value for key, value in (settings or {}).items() if value is not None})
+
+    def answers(self, settings=None):
+        """
+        Return True if select(settings) gives the same result as the server, i.e. unless settings
+        filter on enzyme metadata that the enzyme table does not have (see module docstring).
+        """
+        settings = self._settings(settings)
+        if settings.get("enzymelist"):
+            return True
+        overhang = settings.get("overhang") or ["five_prime", "three_prime", "blunt"]
+        if isinstance(overhang, str):
+            overhang = [overhang]
+        if settings.get("enzymetype") == "NEB" or settings.get("isoschizomers") == "no":
+            return not (self.unknown_cutters or self.unknown_noncutters)
+        if int(settings.get("minlength") or 0) or len(set(overhang)) < 3:
+            return not self.unknown_noncutters
+        return True
+
+    def select(self, settings=None):
+        """
+        Return MapSites with the rows and noncutters selected and sorted by settings (as for get_map).
+        Settings that are not given (or None) take the get_map defaults (default_settings("map")),
+        e.g. minlength 5 and prototypes only, as sitefind would.
+        Check answers(settings) first if the map can have enzymes that are not in the enzyme table.
+        """
+        settings = self._settings(settings)
+        n = len(self.rows)
+        maxcuts = settings.get("maxcuts", "all")
+        maxcuts = None if maxcuts in (None, "all") else int(maxcuts)
+        enzymelist = settings.get("enzymelist")
+        if enzymelist:
+            # The enzyme list overrides all other selection criteria:
+            wanted = {name.lower() for name in enzymelist}
+            mask = [name.lower() in wanted for name in self.names]
+            noncutters = [name for name in self.Noncutters if name.lower() in wanted]
+        else:
+            minlength = int(settings.get("minlength") or 0)
+            overhang = settings.get("overhang") or ["five_prime", "three_prime", "blunt"]
+            if isinstance(overhang, str):
+                overhang = [overhang]
+            overhang = set(overhang)
+            neb_only = settings.get("enzymetype") == "NEB"
+            prototypes_only = settings.get("isoschizomers") == "no"
+            mask = [True] * n
+            if minlength:
+                mask = [m and length >= minlength for m, length in zip(mask, self.lengths)]
+            if len(overhang) < 3:
+                mask = [m and oh in overhang for m, oh in zip(mask, self.overhangs)]
+            if neb_only:
+                mask = [m and neb for m, neb in zip(mask, self.neb)]
+            if prototypes_only:
+                mask = [m and proto for m, proto in zip(mask, self.prototypes)]
+            noncutters = [name for name in self.Noncutters
+                          if self._noncutter_selected(name, minlength, overhang, neb_only, prototypes_only)]
+        if maxcuts is not None:
+            mask = [m and cutnumber <= maxcuts for m, cutnumber in zip(mask, self.cutnumbers)]
+        rows = sort_rows(compress(self.rows, mask), settings)
+        return MapSites(SitefindPage("Restriction Map", rows, noncutters), headers="standard")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for aio.AsyncRemoteRestMap.
+"""
+
+import asyncio
+
+from benchmarks.fixtures import random_sequence
+from benchmarks.stubserver import StubServer
+from pyremoterestmap.aio import AsyncRemoteRestMap
+
+
+def test_map_many_pulls_sequences_lazily():
+    taken = []
+
+    def records():
+        for i in range(20):
+            taken.append(i)
+            yield "seq%s" % i, random_sequence(500, seed=i)
+
+    async def main(url):
+        keys, taken_at_first_result = [], None
+        async with AsyncRemoteRestMap(url, max_concurrency=3, rate=None) as client:
+            async for res in client.map_many(records(), {"minlength": 6}):
+                assert res.error is None
+                if taken_at_first_result is None:
+                    taken_at_first_result = len(taken)
+                keys.append(res.key)
+        return keys, taken_at_first_result
+
+    with StubServer(latency=0.02) as server:
+        keys, taken_at_first_result = asyncio.run(main(server.url))
+    assert sorted(keys) == sorted("seq%s" % i for i in range(20))
+    assert taken_at_first_result <= 3
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for bulk.detect_kind and bulk.parse_file.
+"""
+
+import pytest
+
+from pyremoterestmap.bulk import parse_file
+from pyremoterestmap.digest import Digest
+from pyremoterestmap.map import MapSites
+
+
+MAP_ROWS = [["EcoRI", "GAATTC", "6", "2", "five_prime", "101, 2001"],
+            ["BamHI", "GGATCC", "6", "1", "five_prime", "501"]]
+DIGEST_ROWS = [["501", "", "1", "BamHI", "501", "ACGT"],
+               ["1500", "BamHI", "502", "", "2001", "TTGA"]]
+
+
+def page(title, headers, rows):
+    head = "<head><title>%s</title></head>" % title if title is not None else ""
+    table = "".join("<tr>%s</tr>\n" % "".join("<td>%s</td>" % cell for cell in row) for row in [headers] + rows)
+    return "<html>%s<body><table border=1>\n%s</table>\n<p><b>Noncutters: XhoI</b></p></body></html>\n" % (head, table)
+
+
+@pytest.mark.parametrize("title, headers, rows, kind", [
+    ("Restriction Map", ["NAME", "SITE", "LENGTH", "CUTNUMBER", "OVERHANG", "CUTLIST"], MAP_ROWS, "map"),
+    # A recognition site column called "Sequence" does not make a map a digest:
+    ("Restriction Map", ["Name", "Sequence", "Length", "Cut Number", "Overhang", "Cut List"], MAP_ROWS, "map"),
+    (None, ["Name", "Sequence", "Length", "Cut Number", "Overhang", "Cut List"], MAP_ROWS, "map"),
+    ("Virtual Digest", ["LENGTH", "START_ENZ", "FIVE_PRIME", "END_ENZ", "THREE_PRIME", "SEQUENCE"], DIGEST_ROWS,
+     "digest"),
+    (None, ["Length", "Start Enz", "Five Prime", "End Enz", "Three Prime", "Sequence"], DIGEST_ROWS, "digest"),
+])
+def test_page_kind(tmp_path, title, headers, rows, kind):
+    path = tmp_path / "page.html"
+    path.write_text(page(title, headers, rows))
+    result = parse_file(str(path))
+    assert result.error is None
+    assert result.kind == kind
+    assert result.rows == rows
+    converted = result.to_result()
+    assert isinstance(converted, MapSites if kind == "map" else Digest)
+    assert converted.Noncutters == ["XhoI"]
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for cache.ResultCache and cache.cache_key.
+"""
+
+from collections import OrderedDict
+
+from benchmarks.fixtures import random_sequence
+from benchmarks.stubserver import StubServer
+from pyremoterestmap import RemoteRestMap
+from pyremoterestmap.cache import ResultCache, cache_key
+from pyremoterestmap.local import Enzyme, default_enzymes
+
+
+def test_key_depends_on_url_sequence_and_settings():
+    key = cache_key("http://a/sitefind3.pl", "ACGT", {"minlength": 6})
+    assert key == cache_key("http://a/sitefind3.pl", "acgt", {"minlength": "6", "enzymelist": None})
+    assert key != cache_key("http://b/sitefind3.pl", "ACGT", {"minlength": 6})
+    assert key != cache_key("http://a/sitefind3.pl", "ACGG", {"minlength": 6})
+    assert key != cache_key("http://a/sitefind3.pl", "ACGT", {"minlength": 5})
+
+
+def test_shared_cache_keeps_servers_apart(tmp_path):
+    enzymes = OrderedDict(default_enzymes())
+    enzymes["ZzzI"] = Enzyme("ZzzI", "ACTAGC", 1, 5, "N", "ZzzI")
+    dna = "ACTAGC" + random_sequence(2000, seed=1)
+    cache = ResultCache(str(tmp_path))
+    settings = {"minlength": 6}
+    with StubServer() as server_a, StubServer(enzymes=enzymes) as server_b:
+        map_a = RemoteRestMap(server_a.url, dna, cache=cache).get_map(settings)
+        map_b = RemoteRestMap(server_b.url, dna, cache=cache).get_map(settings)
+        assert "ZzzI" not in [row[0] for row in map_a.rows]
+        assert "ZzzI" in [row[0] for row in map_b.rows]
+        # Both are cached, each under its own server:
+        assert RemoteRestMap(server_b.url, dna, cache=cache).get_map(settings).rows == map_b.rows
+        assert RemoteRestMap(server_a.url, dna, cache=cache).get_map(settings).rows == map_a.rows
+        assert (server_a.requests, server_b.requests) == (1, 1)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for coalesce.SingleFlight.
+"""
+
+import asyncio
+
+import pytest
+
+from pyremoterestmap.coalesce import SingleFlight
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    singleflight = SingleFlight()
+    calls = []
+
+    async def fetch(name):
+        calls.append(name)
+        await asyncio.sleep(0.05)
+        return "result from %s" % name
+
+    async def main():
+        leader = asyncio.ensure_future(singleflight.ado("key", lambda: fetch("leader")))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(singleflight.ado("key", lambda i=i: fetch("follower %s" % i)))
+                     for i in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    results = asyncio.run(main())
+    # One follower took over the call, the others got its result:
+    assert calls == ["leader", "follower 0"]
+    assert results == ["result from follower 0"] * 3
+    assert singleflight.Stats == {'calls': 4, 'executions': 2, 'coalesced': 2}
+    assert singleflight.in_flight == 0
+
+
+def test_leader_exception_is_shared():
+    singleflight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("No Cut Sites")
+
+    async def main():
+        return await asyncio.gather(*[singleflight.ado("key", fail) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(e, ValueError) for e in results)
+    assert singleflight.Stats['executions'] == 1
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for columnar.ColumnarMap and columnar.ColumnarDigest.
+"""
+
+import pytest
+
+from pyremoterestmap.local import LocalRestMap, digest_sequence
+
+DNA = "AAGAATTCAAAACTGCAGTTTTGGATCCAAAAGAATTCAAAAAAGCTTAAAACTCGAGAAAAGCGGCCGCTT" * 3
+
+
+def as_str(seq):
+    return seq if isinstance(seq, str) else bytes(seq).decode("ascii")
+
+
+@pytest.mark.parametrize("parent, lazy", [(DNA, False), (DNA, True), (DNA.encode("ascii"), True)])
+def test_fragment_sequences_match_digest(parent, lazy):
+    cuts = LocalRestMap(DNA).get_cuts({"enzymelist": ["EcoRI", "NotI"]})
+    digest = digest_sequence(parent, cuts, circular=True, lazy=lazy)
+    columnar = digest.to_columnar()
+    # The last fragment spans the origin:
+    assert int(digest.dictrows[-1]['THREE_PRIME']) < int(digest.dictrows[-1]['FIVE_PRIME'])
+    sequences = [as_str(digest.fragment_sequence(i)) for i in range(digest.total)]
+    assert "".join(sequences[-1:] + sequences[:-1]) in DNA + DNA
+    assert [as_str(columnar.fragment_sequence(i)) for i in range(columnar.total)] == sequences
+
+
+def test_cut_index_is_cached():
+    columnar = LocalRestMap(DNA).get_map({"minlength": 6}, columnar=True)
+    index = columnar.cut_index(len(DNA), True)
+    assert columnar.cut_index(len(DNA), True) is index
+    assert columnar.cut_index(len(DNA), False) is not index
+    restriction_map = columnar.to_map()
+    assert list(index.positions) == list(restriction_map.cut_index(len(DNA), True).positions)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for control.HostController.
+"""
+
+import asyncio
+
+import pytest
+
+from pyremoterestmap import RemoteRestMap
+from pyremoterestmap.control import HostController, CircuitOpenError, get_controller
+
+
+def down():
+    raise ConnectionError("down")
+
+
+def half_open_controller():
+    controller = HostController(max_retries=0, failure_threshold=1, reset_timeout=0)
+    with pytest.raises(ConnectionError):
+        controller.call(down)
+    assert controller.state == "open"
+    return controller
+
+
+@pytest.mark.parametrize("interrupt", [KeyboardInterrupt, asyncio.CancelledError])
+def test_interrupted_trial_releases_the_half_open_circuit(interrupt):
+    controller = half_open_controller()
+
+    def interrupted():
+        assert controller.state == "half_open"
+        raise interrupt()
+
+    with pytest.raises(interrupt):
+        controller.call(interrupted)
+    assert controller.in_flight == 0
+    # The next request is the new trial, and closes the circuit:
+    assert controller.call(lambda: "ok") == "ok"
+    assert controller.state == "closed"
+    assert controller.Stats['rejected'] == 0
+
+
+def test_concurrent_request_is_rejected_during_trial():
+    controller = half_open_controller()
+
+    def trial():
+        with pytest.raises(CircuitOpenError):
+            controller.call(lambda: "not sent")
+        return "ok"
+
+    assert controller.call(trial) == "ok"
+    assert controller.Stats['rejected'] == 1
+
+
+def test_controller_is_opt_in():
+    url = "http://localhost/sitefind3.pl"
+    assert RemoteRestMap(url, "ACGT").Controller is None
+    assert RemoteRestMap(url, "ACGT", controller=True).Controller is get_controller(url)
+    controller = HostController()
+    assert RemoteRestMap(url, "ACGT", controller=controller).Controller is controller
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for enzymeindex: EnzymeIndex, cut_difference and CutterTable.
+"""
+
+import random
+
+import pytest
+
+from pyremoterestmap.enzymeindex import CutterTable, cut_difference
+from pyremoterestmap.local import LocalRestMap
+
+
+def random_dna(length, seed):
+    return "".join(random.Random(seed).choices("ACGT", k=length))
+
+
+# GACGTC is the site of AatII and its isoschizomer ZraI, GAATTC of EcoRI, GGATCC of BamHI:
+DNA_A = random_dna(300, 1) + "GACGTC" + random_dna(300, 2) + "GAATTC" + random_dna(300, 3)
+DNA_B = random_dna(300, 4) + "GACGTC" + random_dna(300, 5) + "GGATCC" + random_dna(300, 6)
+ENZYMES = ["AatII", "ZraI", "EcoRI", "BamHI"]
+
+
+def local_map(dna, enzymes):
+    return LocalRestMap(dna).get_map({"enzymelist": enzymes})
+
+
+@pytest.fixture
+def maps():
+    # pA is mapped with the prototype only, pB with the isoschizomer only:
+    return {"pA": local_map(DNA_A, ["AatII", "EcoRI", "BamHI"]),
+            "pB": local_map(DNA_B, ["ZraI", "EcoRI", "BamHI"]),
+            "pC": local_map(random_dna(300, 7), ENZYMES)}
+
+
+def test_index_lookups(maps):
+    index = maps["pA"].enzyme_index()
+    assert index["ecori"]["NAME"] == "EcoRI"
+    assert "ZraI" in index and index.name("zrai") == "AatII"
+    assert "ZraI" not in maps["pA"].enzyme_index(aliases=False)
+    assert maps["pA"].cutter_set == {"AatII", "EcoRI"}
+    assert maps["pA"].noncutter_set == {"BamHI"}
+    assert index.is_noncutter("bamhi")
+
+
+def test_digest_index():
+    digest = LocalRestMap(DNA_A).get_digest({"enzymelist": ["AatII", "EcoRI"]})
+    fragments = digest.enzyme_index()["ZraI"]
+    assert len(fragments) == 2
+    assert all("AatII" in (row["START_ENZ"], row["END_ENZ"]) for row in fragments)
+
+
+def test_isoschizomers_are_resolved_consistently(maps):
+    table = CutterTable(maps)
+    for name in ("AatII", "ZraI", "zrai"):
+        assert (name in maps["pA"].enzyme_index()) and (name in maps["pB"].enzyme_index())
+        assert table.cut_by(name) == ["pA", "pB"]
+    assert table.select(cut=["ZraI"], uncut=["BamHI"]) == ["pA"]
+    assert table.select(uncut=["AatII"]) == ["pC"]
+    assert table.difference("pA", "pB") == {"EcoRI"}
+    assert table.common(["pA", "pB"]) == {"AatII", "ZraI"}
+    assert cut_difference(maps["pA"], maps["pB"]) == {"EcoRI"}
+    assert cut_difference(maps["pB"], maps["pA"]) == {"BamHI"}
+
+
+def test_exact_names_without_aliases(maps):
+    table = CutterTable(maps, aliases=False)
+    assert table.cut_by("ZraI") == ["pB"]
+    assert table.difference("pA", "pB") == {"AatII", "EcoRI"}
+    assert cut_difference(maps["pA"], maps["pB"], aliases=False) == {"AatII", "EcoRI"}
+
+
+def test_table_matches_index_sets():
+    rng = random.Random(11)
+    results = {"p%s" % i: LocalRestMap(random_dna(rng.randint(200, 3000), 100 + i)).get_map({"minlength": 6})
+               for i in range(6)}
+    table = CutterTable(results, aliases=False)
+    cutters = {label: result.cutter_set for label, result in results.items()}
+    for label in results:
+        assert table.cutters(label) == cutters[label]
+        others = set().union(*(cutters[other] for other in results if other != label))
+        assert table.unique(label) == cutters[label] - others
+    assert table.common() == set.intersection(*(set(c) for c in cutters.values()))
+    assert table.union() == set().union(*cutters.values())
+    assert table.difference("p0", "p1") == cutters["p0"] - cutters["p1"]
+    table.remove("p2")
+    assert table.labels == ["p0", "p1", "p3", "p4", "p5"]
+    assert table.cutters("p4") == cutters["p4"]
+    for name in cutters["p5"]:
+        assert table.cut_by(name) == [label for label in table.labels if name in cutters[label]]
+    table.add("p2", results["p2"])
+    assert table.labels[-1] == "p2" and table.cutters("p2") == cutters["p2"]
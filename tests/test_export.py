@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for the export.dump/load binary format.
+"""
+
+import io
+
+import pytest
+
+from pyremoterestmap.digest import Digest
+from pyremoterestmap.export import dump, load
+from pyremoterestmap.local import LocalRestMap
+from pyremoterestmap.map import MapSites
+from pyremoterestmap.parser import SitefindPage
+
+DNA = "GAATTCAAAACTGCAGTTTTGGATCCAAAAGAATTCAAAAAAGCTTAAAACTCGAGAAAAGCGGCCGC" * 5
+
+
+def round_trip(result):
+    fd = io.BytesIO()
+    dump(result, fd)
+    fd.seek(0)
+    return load(fd)
+
+
+def test_map_round_trip():
+    restriction_map = LocalRestMap(DNA).get_map({"DNAtype": "circular"})
+    loaded = round_trip(restriction_map)
+    assert isinstance(loaded, MapSites)
+    assert loaded.headers == restriction_map.headers
+    assert loaded.rows == restriction_map.rows
+    assert loaded.Noncutters == restriction_map.Noncutters
+
+
+def test_lazy_digest_round_trip():
+    digest = LocalRestMap(DNA).get_digest({"enzymelist": ["EcoRI", "PstI", "NotI"]}, lazy=True)
+    loaded = round_trip(digest)
+    assert type(loaded) is Digest
+    assert loaded.rows == list(digest.iter_rows())
+    assert loaded.Noncutters == digest.Noncutters
+
+
+def test_ragged_rows_round_trip():
+    rows = [["100", "EcoRI", "1", "PstI", "100", "GAATTC"],
+            ["Total: 1 fragment"],                             # summary row spanning the columns
+            ["50", "PstI", "101", "", "150", "CTGCAG", "extra"]]
+    digest = Digest(SitefindPage("Virtual Digest", rows, None), headers="standard")
+    loaded = round_trip(digest)
+    assert loaded.rows == rows
+    assert loaded.Noncutters is None
+
+
+def test_truncated_file_raises_value_error():
+    fd = io.BytesIO()
+    dump(LocalRestMap(DNA).get_map(), fd)
+    with pytest.raises(ValueError):
+        load(io.BytesIO(fd.getvalue()[:-20]))
+
+
+def test_cut_off_last_string_raises_value_error():
+    digest = Digest(SitefindPage("Virtual Digest", [["6", "", "1", "", "6", "GAATTC"]], ["NotI"]), headers="standard")
+    fd = io.BytesIO()
+    dump(digest, fd)
+    assert fd.getvalue().endswith(b"NotI")
+    for cut in (1, 3):
+        with pytest.raises(ValueError):
+            load(io.BytesIO(fd.getvalue()[:-cut]))
+
+
+def test_unknown_version_raises_value_error():
+    fd = io.BytesIO()
+    dump(LocalRestMap(DNA).get_map(), fd)
+    data = bytearray(fd.getvalue())
+    data[4] = 2
+    with pytest.raises(ValueError):
+        load(io.BytesIO(bytes(data)))
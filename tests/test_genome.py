@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for genome.scan_genome and genome.map_genome: the results must equal a LocalRestMap map of the sequence.
+"""
+
+import random
+
+import pytest
+
+from pyremoterestmap.genome import scan_genome, map_genome
+from pyremoterestmap.local import LocalRestMap
+
+
+def random_dna(length, seed):
+    return "".join(random.Random(seed).choices("ACGT", k=length))
+
+
+def write_fasta(path, records, width=60):
+    with open(path, "w") as fd:
+        for name, seq in records:
+            fd.write(">%s description\n" % name)
+            for i in range(0, len(seq), width):
+                fd.write(seq[i:i + width].lower() + "\n")
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def genome(tmp_path_factory):
+    records = [("first", random_dna(20000, 2)), ("second", random_dna(7000, 5))]
+    return write_fasta(tmp_path_factory.mktemp("genome") / "genome.fasta", records), dict(records)
+
+
+def assert_same_map(genome_map, expected):
+    restriction_map = genome_map.to_map()
+    assert restriction_map.rows == expected.rows
+    assert sorted(restriction_map.Noncutters) == sorted(expected.Noncutters)
+
+
+@pytest.mark.parametrize("dnatype", ["linear", "circular"])
+@pytest.mark.parametrize("chunk_size, processes", [(10 ** 9, 1), (997, 1), (997, 2)])
+def test_map_genome_matches_local_map(genome, dnatype, chunk_size, processes):
+    path, records = genome
+    settings = {"DNAtype": dnatype, "minlength": 4}
+    expected = LocalRestMap(records["first"]).get_map(settings)
+    assert_same_map(map_genome(path, settings, chunk_size=chunk_size, processes=processes), expected)
+
+
+@pytest.mark.parametrize("dnatype", ["linear", "circular"])
+def test_map_genome_selects_fasta_record(genome, dnatype):
+    path, records = genome
+    settings = {"DNAtype": dnatype, "maxcuts": "3"}
+    expected = LocalRestMap(records["second"]).get_map(settings)
+    assert_same_map(map_genome(path, settings, chunk_size=1009, record="second"), expected)
+    with pytest.raises(ValueError):
+        map_genome(path, settings, record="third")
+
+
+@pytest.mark.parametrize("dnatype", ["linear", "circular"])
+@pytest.mark.parametrize("processes", [1, 2])
+def test_scan_genome_does_not_depend_on_chunk_size(genome, dnatype, processes):
+    path, _ = genome
+    settings = {"DNAtype": dnatype, "minlength": 4}
+    whole = sorted(scan_genome(path, settings, chunk_size=10 ** 9))
+    assert sorted(scan_genome(path, settings, chunk_size=997, processes=processes)) == whole
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for incremental.remap: the result must equal a full LocalRestMap map of the edited sequence.
+"""
+
+import random
+
+import pytest
+
+from pyremoterestmap.local import LocalRestMap, map_cuts
+from pyremoterestmap.incremental import remap, Edit, map_position
+
+
+def full_map(sequence, settings):
+    return LocalRestMap(sequence).get_map(settings)
+
+
+def expected_diff(old_map, new_map, edits):
+    """ Return the (gained, lost) diff computed from two full maps. """
+    old_cuts, new_cuts = map_cuts(old_map), map_cuts(new_map)
+    edits = sorted(edits)
+    gained, lost = {}, {}
+    for name in set(old_cuts) | set(new_cuts):
+        old, new = old_cuts.get(name, []), set(new_cuts.get(name, []))
+        mapped = [map_position(c, edits) for c in old]
+        lost_cuts = [c for c, m in zip(old, mapped) if m not in new]
+        gained_cuts = sorted(new.difference(mapped))
+        if lost_cuts:
+            lost[name] = lost_cuts
+        if gained_cuts:
+            gained[name] = gained_cuts
+    return gained, lost
+
+
+def test_new_cutter_is_gained():
+    dna = "ACGT" * 500
+    settings = {}
+    old_map = full_map(dna, settings)
+    assert "EcoRI" not in map_cuts(old_map)
+    result = remap(old_map, dna, [Edit(1000, 0, "GAATTC")], settings)
+    assert result.map.rows == full_map(result.sequence, settings).rows
+    assert result.gained["EcoRI"] == [1001]
+    assert "EcoRI" not in result.lost
+
+
+def test_cutter_that_stops_cutting_is_lost():
+    dna = "ACGT" * 200 + "GAATTC" + "ACGT" * 200
+    old_map = full_map(dna, {})
+    result = remap(old_map, dna, [Edit(802, 1, "T")])
+    assert result.lost["EcoRI"] == [801]
+    assert "EcoRI" not in map_cuts(result.map)
+
+
+@pytest.mark.parametrize("dnatype", ["linear", "circular"])
+def test_random_edits_match_full_map(dnatype):
+    rng = random.Random(20)
+    settings = {"DNAtype": dnatype}
+    for _ in range(40):
+        dna = "".join(rng.choices("ACGT", k=rng.randint(200, 2000)))
+        old_map = full_map(dna, settings)
+        edits, position = [], 0
+        while len(edits) < 3:
+            position += rng.randint(1, len(dna) // 3)
+            delete = rng.randint(0, 8)
+            if position + delete > len(dna):
+                break
+            insert = rng.choice(["", "GAATTC", "CTGCAG", "GGATCC", "".join(rng.choices("ACGT", k=rng.randint(1, 12)))])
+            edits.append(Edit(position, delete, insert))
+            position += delete
+        result = remap(old_map, dna, edits, settings)
+        new_map = full_map(result.sequence, settings)
+        assert result.map.rows == new_map.rows
+        assert sorted(result.map.Noncutters) == sorted(new_map.Noncutters)
+        gained, lost = expected_diff(old_map, new_map, edits)
+        assert result.gained == gained
+        assert {name: sorted(cuts) for name, cuts in result.lost.items()} == \
+            {name: sorted(cuts) for name, cuts in lost.items()}
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for the seqio readers.
+"""
+
+import gzip
+import io
+
+from pyremoterestmap.seqio import read_records, normalize_sequence
+
+FASTA = "\n>seq1 first\nACGT\nGGCC\n>seq2\nTTAA\n"
+GENBANK = """LOCUS       pTest        12 bp    DNA     circular
+FEATURES             Location/Qualifiers
+ORIGIN
+        1 gaattc aaaa
+       11 cc
+//
+"""
+
+
+def test_read_records_from_path_handle_and_lines(tmp_path):
+    path = tmp_path / "seqs.fasta"
+    path.write_text(FASTA)
+    expected = [("seq1 first", "ACGTGGCC"), ("seq2", "TTAA")]
+    assert list(read_records(path)) == expected
+    assert list(read_records(str(path))) == expected
+    with open(path) as fd:
+        assert list(read_records(fd)) == expected
+    assert list(read_records(FASTA.splitlines(True))) == expected
+    assert list(read_records(io.StringIO(FASTA), format="fasta")) == expected
+
+
+def test_read_records_detects_gzipped_genbank(tmp_path):
+    path = tmp_path / "plasmid.gb.gz"
+    with gzip.open(path, "wt") as fd:
+        fd.write(GENBANK)
+    assert list(read_records(str(path))) == [("pTest", "gaattcaaaacc")]
+
+
+def test_normalize_sequence_reports_invalid_positions():
+    assert normalize_sequence("acgt nnn\n1 gatc") == ("ACGTGATC", [5, 6, 7])
+
+
+def test_normalize_sequence_without_stripping_keeps_everything():
+    assert normalize_sequence("acgt n\n1", strip=False) == ("ACGT N\n1", [4, 5, 6, 7])
+
+
+def test_sequence_setter_without_stripping_keeps_old_semantics():
+    from pyremoterestmap import RemoteRestMap
+    request = RemoteRestMap("http://localhost/sitefind3.pl", "acgt")
+    request.StripNonValidBases = False
+    request.Sequence = "acgt nn\n1"
+    assert request.Sequence == "ACGT NN\n1"
+    assert request.InvalidPositions == [4, 5, 6, 7, 8]
+    request.StripNonValidBases = True
+    request.Sequence = "acgt nn\n1"
+    assert request.Sequence == "ACGT"
+    assert request.InvalidPositions == [5, 6]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for store.ResultStore queries.
+"""
+
+import random
+
+from pyremoterestmap.local import LocalRestMap
+from pyremoterestmap.store import ResultStore
+
+
+def random_sequence(length, seed):
+    return "".join(random.Random(seed).choices("ACGT", k=length))
+
+
+def test_find_fragments_only_uses_maps_with_all_enzymes():
+    store = ResultStore()
+    settings = {"DNAtype": "circular"}
+    for seed in range(60):
+        dna = random_sequence(4000, seed)
+        request = LocalRestMap(dna)
+        # Maps that cannot give the EcoRI + PstI digest (PstI missing, or possibly removed by maxcuts):
+        store.add("ecori-%s" % seed, request.get_map(dict(settings, enzymelist=["EcoRI"])),
+                  settings=dict(settings, enzymelist=["EcoRI"]), sequence=dna)
+        store.add("maxcuts-%s" % seed, request.get_map(dict(settings, maxcuts="1")),
+                  settings=dict(settings, maxcuts="1"), sequence=dna)
+        store.add("full-%s" % seed, request.get_map(settings), settings=settings, sequence=dna)
+    found = store.find_fragments(900, 1100, ["EcoRI", "pstI"])
+    assert found
+    for name, digest in found:
+        assert not name.startswith("ecori-")
+        dna = random_sequence(4000, int(name.split("-")[1]))
+        expected = LocalRestMap(dna).get_digest(dict(settings, enzymelist=["EcoRI", "PstI"]))
+        assert [row['LENGTH'] for row in digest.dictrows] == [row['LENGTH'] for row in expected.dictrows]
+    names = [name for name, _ in found]
+    for seed in range(60):
+        if "full-%s" % seed in names:
+            continue
+        dna = random_sequence(4000, seed)
+        try:
+            expected = LocalRestMap(dna).get_digest(dict(settings, enzymelist=["EcoRI", "PstI"]))
+        except ValueError:
+            continue
+        assert not any(900 <= int(row['LENGTH']) <= 1100 for row in expected.dictrows)
+
+
+def test_cut_queries_use_the_enzyme_indexes():
+    store = ResultStore()
+    plan = " ".join(row[3] for row in store.db.execute(
+        "EXPLAIN QUERY PLAN SELECT result_id FROM cuts WHERE enzyme IN (?, ?)", ("ecori", "PSTI")))
+    assert "USING COVERING INDEX cuts_enzyme" in plan
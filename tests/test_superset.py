@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# pylint: disable=C0103,W0142
+
+"""
+Tests for superset.SupersetMap.select.
+"""
+
+import random
+
+import pytest
+
+from pyremoterestmap import default_settings
+from pyremoterestmap.local import LocalRestMap, default_enzymes
+from pyremoterestmap.superset import SupersetMap, superset_settings
+
+
+@pytest.fixture(scope="module")
+def request_and_superset():
+    request = LocalRestMap("".join(random.Random(3).choices("ACGT", k=4000)))
+    return request, SupersetMap(request.get_map(superset_settings("linear")))
+
+
+@pytest.mark.parametrize("settings", [{}, {"maxcuts": "1"}, {"minlength": None}, {"enzymetype": "NEB"},
+                                      {"minlength": 4, "isoschizomers": "all", "first": "name"}])
+def test_missing_settings_take_get_map_defaults(request_and_superset, settings):
+    request, superset = request_and_superset
+    selected = superset.select(settings)
+    given = {key: value for key, value in settings.items() if value is not None}
+    expected = request.get_map(dict(default_settings("map"), **given))
+    assert sorted(selected.rows) == sorted(expected.rows)
+    assert sorted(selected.Noncutters) == sorted(expected.Noncutters)
+
+
+def test_defaults_are_prototypes_with_5_bp_sites(request_and_superset):
+    _, superset = request_and_superset
+    enzymes = default_enzymes()
+    rows = superset.select().rows
+    assert rows
+    assert all(int(row[2]) >= 5 for row in rows)
+    assert all(enzymes[row[0]].prototype == row[0] for row in rows)
+
+
+@pytest.fixture(scope="module")
+def server_with_more_enzymes():
+    from collections import OrderedDict
+    from pyremoterestmap.local import Enzyme
+    from benchmarks.stubserver import StubServer
+    enzymes = OrderedDict(default_enzymes())
+    # An NEB prototype, an isoschizomer of EcoRI and a noncutter, none of them in the bundled table:
+    enzymes["ZzzI"] = Enzyme("ZzzI", "ACTAGC", 1, 5, "N", "ZzzI")
+    enzymes["YyyI"] = Enzyme("YyyI", "GAATTC", 1, 5, "", "EcoRI")
+    enzymes["QqqI"] = Enzyme("QqqI", "GGGGCCCCAAAATTTT", 8, 8, "N", "QqqI")
+    with StubServer(enzymes=enzymes) as server:
+        yield server
+
+
+@pytest.mark.parametrize("settings", [{}, {"enzymetype": "NEB"}, {"isoschizomers": "no"},
+                                      {"isoschizomers": "all", "minlength": 4}, {"maxcuts": "2"},
+                                      {"enzymelist": ["EcoRI", "YyyI", "ZzzI", "QqqI", "BamHI"]}])
+def test_superset_matches_server_with_unknown_enzymes(server_with_more_enzymes, settings):
+    from pyremoterestmap import RemoteRestMap
+    dna = "ACTAGC" + "".join(random.Random(3).choices("ACGT", k=4000)) + "GAATTC"
+    with RemoteRestMap(server_with_more_enzymes.url, dna, controller=False) as direct, \
+            RemoteRestMap(server_with_more_enzymes.url, dna, controller=False, superset=True) as request:
+        expected = direct.get_map(settings)
+        selected = request.get_map(dict(settings))
+    assert selected.rows == expected.rows
+    assert sorted(selected.Noncutters) == sorted(expected.Noncutters)
+
+
+def test_unknown_enzymes_are_asked_from_the_server(server_with_more_enzymes):
+    from pyremoterestmap import RemoteRestMap
+    dna = "ACTAGC" + "".join(random.Random(3).choices("ACGT", k=4000)) + "GAATTC"
+    with RemoteRestMap(server_with_more_enzymes.url, dna, controller=False, superset=True) as request:
+        superset = request.superset_map("linear")
+        assert superset.unknown_cutters == {"ZzzI", "YyyI"}
+        assert superset.unknown_noncutters == {"QqqI"}
+        assert not superset.answers({"enzymetype": "NEB"})
+        assert superset.answers({"enzymelist": ["ZzzI"]})
+        before = server_with_more_enzymes.requests
+        assert [row[0] for row in request.get_map({"enzymelist": ["ZzzI"]}).rows] == ["ZzzI"]
+        assert server_with_more_enzymes.requests == before
+        assert "ZzzI" in [row[0] for row in request.get_map({"enzymetype": "NEB"}).rows]
+        assert server_with_more_enzymes.requests == before + 1